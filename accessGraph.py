@@ -15,6 +15,22 @@ import os.path
 import os
 import copy
 import contextlib
+import heapq
+import json
+import argparse
+import hashlib
+import csv
+import glob
+import concurrent.futures
+import time
+import tracemalloc
+import cProfile
+import platform
+#resource is only available on Unix. Without it, profile reports leave out the peak memory of the process
+try:
+    import resource
+except ImportError:
+    resource = None
 
 #note - numpy is used for array handling for the graph
 #if you do not have this package installed, run:
@@ -22,6 +38,11 @@ import contextlib
 #from a terminal
 import numpy as np
 
+#the type used to store distances
+#   np.float32 uses half the memory of np.float64, and is exact for whole
+#   number distances up to 16,777,216
+DTYPE = np.float64
+
 #defines infinity as a global constant
 #approximated at 9,999,999 because we assume no single 
 #   path length will come close to this
@@ -75,9 +96,138 @@ def readFile(inFile, G, R, I, E):
                     else: 
                         E.append(line.replace("\n",""))     
     else:
-        os.system('cls' if os.name == 'nt' else 'clear') 
+        clearScreen() 
         sys.exit("    Error: Invalid Input File Name: '" + inFile + "' could not be found.")           
 
+#reads in the input file in a single pass, without keeping the edge lines in memory
+#   this is a faster replacement for readFile followed by splitting each list
+#   and calling loadNodes. Each line is checked as it is read, and the program
+#   exits with the line number of the first malformed line
+#takes 1 parameter:
+#   inFile - the name of the input file
+#
+#returns G, R, I, N, src, dst, wt
+#   G, R, I - the grocery stores, residential areas and intersections,
+#       already split on spaces (i.e. ["R001","RA","One"])
+#   N - the codes of all of the nodes, in the order loadNodes uses
+#   src, dst, wt - numpy arrays holding the index (in N) of the two nodes
+#       joined by each edge, and the length of the edge
+def loadFile(inFile):
+    if (not os.path.exists(inFile)):
+        sys.exit("    Error: Invalid Input File Name: '" + inFile + "' could not be found.")
+    
+    G = []
+    R = []
+    I = []
+    N = []
+    
+    #the arrays are sized from the file size (assuming about 12 characters per edge line),
+    #   and grown if there turn out to be more edges than that
+    size = max(16, os.path.getsize(inFile) // 12)
+    src = np.empty(size, dtype=np.int64)
+    dst = np.empty(size, dtype=np.int64)
+    wt = np.empty(size, dtype=np.float64)
+    count = 0
+    
+    with (open(inFile,'r')) as file:
+        ln = 0
+        #reads the nodes, up to the <EDGES> designator
+        for line in file:
+            ln += 1
+            #skips blank lines
+            if(not line.strip()):
+                continue
+            #ignores the <NODES> designator
+            elif(line[0] == '<' and line[1] == 'N'):
+                continue
+            #designates the start of the edges
+            elif(line[0] == '<' and line[1] == 'E'):
+                break
+            #case: grocery store
+            elif(line[0] == 'G'):
+                G.append(line.split())
+            #case: residential area
+            elif(line[0] == 'R'):
+                R.append(line.split())
+            #case: intersection
+            elif(line[0] == 'I'):
+                I.append(line.split())
+            #case: invalid input
+            else: sys.exit("    Error: Invalid Input Detected on Line " + str(ln) + " in file '" + inFile + "'\n")
+        
+        #now that all the nodes are known, each code is given its index in N
+        loadNodes(G,R,I,N)
+        index = {}
+        for x in range(len(N)):
+            if(N[x] in index):
+                sys.exit("    Error: Duplicate Node '" + N[x] + "' in file '" + inFile + "'\n")
+            index[N[x]] = x
+        
+        #reads the edges a few megabytes at a time
+        #   each block of lines is split and looked up all at once, which is much
+        #   faster than handling one line at a time. If any line that is not blank
+        #   does not hold exactly three values, or the block has an unknown node or
+        #   a bad length, it is read again line by line to find the line with the problem
+        while(True):
+            lines = file.readlines(1 << 22)
+            if(not lines):
+                break
+            try:
+                #the number of values on each line (0 for a blank line)
+                if(not set(map(len, map(str.split, lines))) <= {0, 3}):
+                    raise ValueError
+                part = "".join(lines).split()
+                block = (list(map(index.__getitem__, part[0::3])),
+                         list(map(index.__getitem__, part[1::3])),
+                         list(map(float, part[2::3])))
+            except (KeyError, ValueError):
+                block = readEdgeLines(lines, ln, index, inFile)
+            src, dst, wt, count = addEdges(src, dst, wt, count, block)
+            ln += len(lines)
+    
+    return G, R, I, N, src[0:count].copy(), dst[0:count].copy(), wt[0:count].copy()
+
+#reads a block of edge lines one at a time, for loadFile
+#   lines is the list of lines, and ln is the line number before the first one
+#   index is a dictionary giving the index of each node code
+#   exits with the line number of the first malformed line
+#   returns three lists holding the two node indices and the length of each edge
+def readEdgeLines(lines, ln, index, inFile):
+    block = ([], [], [])
+    for line in lines:
+        ln += 1
+        part = line.split()
+        #skips blank lines
+        if(not part):
+            continue
+        elif(len(part) != 3):
+            sys.exit("    Error: Invalid Edge Detected on Line " + str(ln) + " in file '" + inFile + "'\n")
+        elif(part[0] not in index or part[1] not in index):
+            sys.exit("    Error: Unknown Node in Edge on Line " + str(ln) + " in file '" + inFile + "'\n")
+        try:
+            dist = float(part[2])
+        except ValueError:
+            sys.exit("    Error: Invalid Edge Length Detected on Line " + str(ln) + " in file '" + inFile + "'\n")
+        block[0].append(index[part[0]])
+        block[1].append(index[part[1]])
+        block[2].append(dist)
+    return block
+
+#copies a block of edges (three lists) into the edge arrays used by loadFile
+#   count is the number of edges already in the arrays
+#   the arrays are doubled in size if they are full
+#   returns src, dst, wt and the new count
+def addEdges(src, dst, wt, count, block):
+    size = len(block[0])
+    while(count + size > len(src)):
+        src = np.resize(src, 2*len(src))
+        dst = np.resize(dst, 2*len(dst))
+        wt = np.resize(wt, 2*len(wt))
+    src[count:count+size] = block[0]
+    dst[count:count+size] = block[1]
+    wt[count:count+size] = block[2]
+    return src, dst, wt, count + size
+
 #prints the lists - used primarily for debugging purposes
 #takes in 4 lists:
 #   G (the grocery stores) 
@@ -114,31 +264,234 @@ def loadNodes(G,R,I,N):
 #
 #returns a two-dimensional list acting as the graph
 def prepGraph(N,E):
+    src, dst, wt = edgeArrays(N,E)
+    return prepGraphArrays(len(N),src,dst,wt)
+
+#turns a list of edges into three numpy arrays: the index (in N) of the
+#   start and end of each edge, and its length
+#takes in 2 lists:
+#   N (all the nodes)
+#   E (all the edges, split on spaces)
+def edgeArrays(N,E):
+    #a dictionary is used so each lookup does not have to scan N
+    index = {}
+    for x in range(len(N)):
+        if(N[x] not in index):
+            index[N[x]] = x
     
-    #sets up an empty array of correct dimensions
+    src = np.empty(len(E), dtype=np.int64)
+    dst = np.empty(len(E), dtype=np.int64)
+    wt = np.empty(len(E), dtype=np.float64)
+    for x in range(len(E)):
+        src[x] = index[E[x][0]]
+        dst[x] = index[E[x][1]]
+        wt[x] = float(E[x][2])
+    return src, dst, wt
+
+#the same as prepGraph, but takes the edges as arrays (see loadFile)
+#   n is the number of nodes
+#   src, dst, wt hold the two nodes and the length of each edge
+#   dtype is the type used to store the distances (see DTYPE)
+def prepGraphArrays(n,src,dst,wt,dtype = np.float64):
     #fills the array with the value nan as a placeholder
-    graph=np.empty((int(len(N)),int(len(N)))) * np.nan
+    graph = np.full((n,n), np.nan, dtype=dtype)
     
-    #loops through the edges, initializing the graph
-    for x in range(len(E)):
-        start = E[x][0]
-        stop = E[x][1]
-        dist = E[x][2]
-        graph[N.index(start)][N.index(stop)] = float(dist)
     #IMPORTANT: this is set up to treat every edge as undirected
-    #   need to implement a fix to allow for directed nodes  
-    for x in range(len(E)):
-        start = E[x][1]
-        stop = E[x][0]
-        dist = E[x][2]
-        graph[N.index(start)][N.index(stop)] = float(dist)
+    #   need to implement a fix to allow for directed nodes
+    #if two nodes are joined by more than one edge, the shortest one is kept
+    #   (np.fmin ignores the nan placeholder, and .at applies every edge, even repeated ones)
+    np.fmin.at(graph, (src,dst), wt)
+    np.fmin.at(graph, (dst,src), wt)
     return graph
 
+#turns the lists of nodes and edges into a sparse adjacency list
+#   this is used by the dijkstra engine instead of the dense matrix from prepGraph
+#   like prepGraph, every edge is treated as undirected
+#   if two nodes are joined by more than one edge, all of them are kept, so the
+#       shortest one is used (the same as prepGraph)
+#takes in 2 lists:
+#   N (all the nodes)
+#   E (all the edges)
+#
+#returns the adjacency list in compressed form, as three numpy arrays:
+#   indptr - the neighbours of node x are stored at positions indptr[x] to indptr[x+1]
+#   indices - the index of each neighbour
+#   weights - the length of the edge to each neighbour
+def prepAdj(N,E):
+    src, dst, wt = edgeArrays(N,E)
+    return prepAdjArrays(len(N),src,dst,wt)
+
+#the same as prepAdj, but takes the edges as arrays (see loadFile)
+#   n is the number of nodes
+#   src, dst, wt hold the two nodes and the length of each edge
+#   dtype is the type used to store the lengths (see DTYPE)
+#the adjacency list only takes space for the edges, unlike the n by n matrix from
+#   prepGraph, and node indices are stored as 32 bit integers when there are few enough nodes
+def prepAdjArrays(n,src,dst,wt,dtype = np.float64):
+    itype = np.int32 if n < 2**31 else np.int64
+    #every edge is stored once in each direction
+    start = np.concatenate((src,dst))
+    stop = np.concatenate((dst,src)).astype(itype)
+    dist = np.concatenate((wt,wt)).astype(dtype)
+    
+    #groups the edges by their starting node
+    order = np.argsort(start, kind='stable')
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(start, minlength=n), out=indptr[1:])
+    return indptr, stop[order], dist[order]
+
+#turns an adjacency list from prepAdj back into arrays of edges
+#   every edge is returned once in each direction, so passing the result to
+#   prepGraphArrays gives the same graph
+#   returns src, dst, wt
+def adjEdges(adj):
+    indptr, indices, weights = adj
+    src = np.repeat(np.arange(len(indptr)-1), np.diff(indptr))
+    return src, np.asarray(indices), np.asarray(weights)
+
+#removes the intersections that can not change the distance between any two
+#   grocery stores or residential areas, so the shortest path engines have fewer nodes to work on
+#   n is the number of nodes
+#   first is the index of the first intersection (len(G) + len(R)). Nodes before it are always kept
+#   src, dst, wt hold the two nodes and the length of each edge
+#the graph is changed in these steps, repeated until nothing else can be removed:
+#   if two nodes are joined by more than one edge, only the shortest is kept
+#       (edges from a node to itself are dropped)
+#   an intersection with one neighbour (or none) is a dead end, and is removed
+#       this removes every dangling branch of intersections, one node at a time
+#   an intersection with two neighbours is removed, and its two edges are joined
+#       into one edge with the length of both (unless the neighbours already
+#       have a shorter edge between them)
+#the distance between every pair of nodes left is the same as before
+#returns keep, src, dst, wt
+#   keep is the old index of each node left, in order. Node keep[x] is now node x, so
+#       the grocery stores and residential areas keep their indices
+#   src, dst, wt are the edges left, using the new indices
+def simplifyEdges(n, first, src, dst, wt):
+    #the neighbours of each node, and the length of the shortest edge to each
+    near = [{} for x in range(n)]
+    for a, b, w in zip(src.tolist(), dst.tolist(), wt.tolist()):
+        if(a != b and w < near[a].get(b, np.inf)):
+            near[a][b] = w
+            near[b][a] = w
+    
+    removed = np.zeros(n, dtype=bool)
+    stack = [x for x in range(first, n) if len(near[x]) <= 2]
+    while(stack):
+        x = stack.pop()
+        if(removed[x] or len(near[x]) > 2):
+            continue
+        removed[x] = True
+        edges = list(near[x].items())
+        for y, w in edges:
+            del near[y][x]
+        if(len(edges) == 2):
+            (a, u), (b, v) = edges
+            if(u + v < near[a].get(b, np.inf)):
+                near[a][b] = u + v
+                near[b][a] = u + v
+        #the neighbours may now be dead ends or chain links themselves
+        for y, w in edges:
+            if(y >= first and len(near[y]) <= 2):
+                stack.append(y)
+    
+    keep = np.flatnonzero(~removed)
+    label = np.cumsum(~removed) - 1
+    edges = [(x, y, w) for x in keep.tolist() for y, w in near[x].items() if x < y]
+    ends = label[np.array([(x, y) for x, y, w in edges], dtype=np.int64).reshape(-1, 2)]
+    return keep, ends[:,0].astype(src.dtype), ends[:,1].astype(dst.dtype), np.array([w for x, y, w in edges], dtype=wt.dtype)
+
+#simplifies a graph read by readGraph (see simplifyEdges)
+#   takes the values returned by readGraph (stored does not change, as the grocery
+#   stores and residential areas are all kept)
+#returns I, N, src, dst, wt, adj, removed
+#   I and N only hold the intersections that are left
+#   removed is [number of nodes removed, number of edges removed]
+def simplifyGraph(G, R, I, N, src, dst, wt, adj):
+    first = len(G) + len(R)
+    #compiled files hold every edge once in each direction (see adjEdges)
+    count = len(src) // 2 if len(src) == len(adj[1]) else len(src)
+    keep, src, dst, wt = simplifyEdges(len(N), first, src, dst, wt)
+    removed = [len(N) - len(keep), count - len(src)]
+    I = [I[x - first] for x in keep[first:].tolist()]
+    N = [N[x] for x in keep.tolist()]
+    return I, N, src, dst, wt, prepAdjArrays(len(N),src,dst,wt,adj[2].dtype), removed
+
+#labels the connected pieces (components) of the graph, using union-find over the edges
+#   n is the number of nodes
+#   src, dst hold the two nodes of each edge
+#no path joins two nodes in different components, so each component can be solved on its own
+#returns an array holding the component number of each node
+#   components are numbered from 0, in order of their first node
+def findComponents(n, src, dst):
+    #each node points towards the first node of its component
+    parent = list(range(n))
+    for a, b in zip(src.tolist(), dst.tolist()):
+        while(parent[a] != a):
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while(parent[b] != b):
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if(a < b):
+            parent[b] = a
+        elif(b < a):
+            parent[a] = b
+    
+    #the parent of an earlier node is already its root, so one pass finds every root
+    for x in range(n):
+        parent[x] = parent[parent[x]]
+    return np.unique(np.array(parent, dtype=np.int64), return_inverse=True)[1].reshape(-1)
+
+#names of the engines that pathGraph can use
+#   'numpy'   - vectorized floyd-warshall (default)
+#   'blocked' - floyd-warshall done one tile at a time, spread across threads
+#   'loop'    - the original triple loop, used as a reference
+#the 'dijkstra' engine does not build the full path matrix, see distTable
+#the 'nearest' engine only finds the nearest few stores, see nearestTable
+#the 'hierarchy' engine builds a contraction hierarchy once (saved in the cache), then
+#   finds the distances with small searches, see buildHierarchy and hierarchyTable
+ENGINES = ['numpy','blocked','loop','dijkstra','nearest','hierarchy']
+
+#settings for the blocked engine
+#   TILE_SIZE is the number of rows and columns in each tile. Tiles should be small
+#       enough for a few of them to fit in the processor cache
+#   THREADS is the number of threads to use (None uses one per core)
+TILE_SIZE = 256
+THREADS = None
+
 #Computes the floyd-warshall algorithm with the given graph
 #   the input graph should hold an adjacency matrix for all the nodes
+#   engine is one of the names in ENGINES
+#   inPlace can be set to true to let the numpy engine reuse graph for the result
+#       instead of making a copy (graph is then changed)
+#   track can be set to true to also find the route of each shortest path (numpy and
+#       blocked engines only). See nextHops
 #   returns path, the completed floyd-warshall matrix
 #       each [x][y] holds the shortest distance from node x to node y
-def pathGraph(graph):
+#       (nan if there is no path between x and y)
+#   if track is true, returns path, nxt instead
+#       nxt is an int32 matrix where [x][y] is the node after x on the shortest path
+#       from x to y (-1 if there is no path). See routeNext
+def pathGraph(graph, engine = 'numpy', inPlace = False, track = False):
+    if(engine == 'numpy'):
+        return pathGraphNumpy(graph, inPlace, track)
+    elif(engine == 'blocked'):
+        return pathGraphBlocked(graph, inPlace, track=track)
+    elif(track):
+        sys.exit("    Error: The " + engine + " engine can not track routes. Use the numpy or blocked engine, or nearestRoutes.\n")
+    elif(engine == 'loop'):
+        return pathGraphLoop(graph)
+    elif(engine == 'dijkstra' or engine == 'nearest' or engine == 'hierarchy'):
+        sys.exit("    Error: The " + engine + " engine does not build a full path matrix. Use distTable, nearestTable or hierarchyTable instead.\n")
+    else:
+        sys.exit("    Error: Unknown Engine '" + str(engine) + "'. Valid engines are: " + ", ".join(ENGINES) + "\n")
+
+#the original floyd-warshall implementation, kept as the reference engine
+#   runs three nested python loops, so it is only practical for small graphs
+#   the input graph should hold an adjacency matrix for all the nodes
+#   returns path, the completed floyd-warshall matrix
+def pathGraphLoop(graph):
     #creates a deep copy of graph to prevent shallow copy errors
     path = copy.deepcopy(graph)
     
@@ -168,6 +521,467 @@ def pathGraph(graph):
                         path[y][z]=hold
     return path           
 
+#vectorized floyd-warshall
+#   does one broadcasted relaxation over the whole matrix per pivot node,
+#   so the work per pivot is done by numpy instead of the interpreter
+#   np.inf is used as the "no edge" value while the algorithm runs,
+#   and is turned back into nan at the end so that the result matches pathGraphLoop
+#   the diagonal is left as it was in graph, as pathGraphLoop never updates it
+#   the result has the same type as graph (float32 or float64)
+#   if inPlace is true, graph itself is turned into the result instead of being copied
+#   rows are relaxed a block at a time, so the only other memory used is one block
+#       (row k and column k do not change while k is the pivot, so this gives the same result)
+#   track is the same as in pathGraph. When a shorter path from x to y through k is
+#       found, the next node from x to y becomes the next node from x to k
+def pathGraphNumpy(graph, inPlace = False, track = False):
+    path, diag = startPath(graph, inPlace)
+    nxt = nextHops(path) if track else None
+    
+    #the number of rows in a block, so that each block holds about 8 million values
+    step = max(1, (1 << 23) // max(1, len(path)))
+    for k in range(len(path)):
+        for x in range(0, len(path), step):
+            block = path[x:x+step]
+            if(nxt is None):
+                np.minimum(block, block[:,k,None] + path[None,k,:], out=block)
+            else:
+                found = block[:,k,None] + path[None,k,:]
+                better = found < block
+                np.copyto(block, found, where=better)
+                np.copyto(nxt[x:x+step], nxt[x:x+step,k,None], where=better)
+    
+    return finishPath(path, diag, nxt)
+
+#vectorized floyd-warshall on many graphs of the same size at once
+#   graphs is a stack of adjacency matrices (graphs[b] is one matrix from prepGraph),
+#       such as the same roads with different edge lengths
+#   each pivot node is relaxed in every graph with one numpy call, so the time spent
+#       in the interpreter is shared by the whole stack. This matters most on small graphs,
+#       where pathGraphNumpy spends more time between numpy calls than in them
+#   gives the same result as pathGraphNumpy on each graph (nan where there is no path,
+#       and the diagonal left as it was)
+#   graphs must be a float array, and is turned into the result in place
+def pathGraphBatch(graphs):
+    n = graphs.shape[1]
+    diag = np.diagonal(graphs, axis1=1, axis2=2).copy()
+    graphs[np.isnan(graphs)] = np.inf
+    
+    #the number of rows in a block, so that each block holds about 8 million values
+    step = max(1, (1 << 23) // max(1, len(graphs) * n))
+    for k in range(n):
+        for x in range(0, n, step):
+            block = graphs[:,x:x+step]
+            np.minimum(block, block[:,:,k,None] + graphs[:,None,k,:], out=block)
+    
+    graphs[:,np.arange(n),np.arange(n)] = diag
+    graphs[np.isinf(graphs)] = np.nan
+    return graphs
+
+#blocked (tiled) floyd-warshall
+#   gives the same result as pathGraphNumpy, but splits the matrix into tiles of
+#   tile by tile nodes, so the values being worked on stay in the processor cache
+#for each diagonal tile k, in three phases:
+#   1. runs floyd-warshall within tile (k,k)
+#   2. updates the other tiles in row k and column k, using tile (k,k)
+#   3. updates every other tile (i,j), using tiles (i,k) and (k,j)
+#the tiles in phases 2 and 3 do not depend on each other, so they are spread across
+#   a pool of threads. numpy releases the GIL while it works, so the threads run at the same time
+#tile and threads default to TILE_SIZE and THREADS
+#inPlace and track are the same as in pathGraphNumpy
+def pathGraphBlocked(graph, inPlace = False, tile = None, threads = None, track = False):
+    path, diag = startPath(graph, inPlace)
+    #without tracking, a matrix of size 0 is passed around in place of the next nodes
+    nxt = nextHops(path) if track else np.zeros((0, 0), dtype=np.int32)
+    tile = TILE_SIZE if tile is None else tile
+    threads = THREADS if threads is None else threads
+    n = len(path)
+    tiles = [slice(x, min(x + tile, n)) for x in range(0, n, tile)]
+    
+    with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        for k in tiles:
+            center = path[k,k]
+            minPlus(center, center, center, nxt[k,k], nxt[k,k])
+            
+            jobs = []
+            for x in tiles:
+                if(x != k):
+                    jobs.append(pool.submit(minPlus, path[k,x], center, path[k,x], nxt[k,x], nxt[k,k]))
+                    jobs.append(pool.submit(minPlus, path[x,k], path[x,k], center, nxt[x,k], nxt[x,k]))
+            for x in jobs:
+                x.result()
+            
+            jobs = []
+            for x in tiles:
+                for y in tiles:
+                    if(x != k and y != k):
+                        jobs.append(pool.submit(minPlus, path[x,y], path[x,k], path[k,y], nxt[x,y], nxt[x,k]))
+            for x in jobs:
+                x.result()
+    
+    return finishPath(path, diag, nxt if track else None)
+
+#updates tile c with the shortest paths through the nodes that join tiles a and b:
+#   c[i][j] = min(c[i][j], a[i][p] + b[p][j]) for each p, in order
+#   (a, b and c may be the same tile, which is floyd-warshall within the tile)
+#cNext and aNext are the next node tiles for c and a (see nextHops). They are
+#   empty when routes are not being tracked
+def minPlus(c, a, b, cNext, aNext):
+    for p in range(a.shape[1]):
+        if(cNext.size == 0):
+            np.minimum(c, a[:,p,None] + b[None,p,:], out=c)
+        else:
+            found = a[:,p,None] + b[None,p,:]
+            better = found < c
+            np.copyto(c, found, where=better)
+            np.copyto(cNext, aNext[:,p,None], where=better)
+
+#sets up a matrix for the floyd-warshall engines
+#   copies graph (unless inPlace is true and graph is already a float array) and
+#   changes nan to np.inf
+#returns the matrix and a copy of its diagonal, to pass to finishPath
+def startPath(graph, inPlace = False):
+    if(inPlace and isinstance(graph, np.ndarray) and graph.dtype.kind == 'f'):
+        path = graph
+    else:
+        path = np.array(graph, dtype=np.result_type(np.asarray(graph).dtype, np.float32))
+    diag = path.diagonal().copy()
+    path[np.isnan(path)] = np.inf
+    return path, diag
+
+#sets up the next node matrix for a floyd-warshall engine that tracks routes
+#   path is the matrix from startPath, before any paths are found
+#returns an int32 matrix where [x][y] is y if there is an edge from x to y, and -1 otherwise
+def nextHops(path):
+    nxt = np.where(np.isinf(path), -1, np.arange(len(path), dtype=np.int32)[None,:]).astype(np.int32)
+    return nxt
+
+#turns the result of a floyd-warshall engine back into the form pathGraph returns:
+#   puts back the original diagonal and changes np.inf to nan
+#   nxt is the next node matrix, if routes were tracked (the route from a node to
+#       itself is just that node)
+def finishPath(path, diag, nxt = None):
+    np.fill_diagonal(path, diag)
+    path[np.isinf(path)] = np.nan
+    if(nxt is not None):
+        np.fill_diagonal(nxt, np.arange(len(nxt), dtype=np.int32))
+        return path, nxt
+    return path
+
+#finds the shortest distance from one node to every other node
+#   adj is the adjacency list from prepAdj
+#   source is the index of the starting node
+#   targets is an optional collection of node indices. If given, the search stops
+#       once all of them have been reached, instead of exploring the whole graph
+#   count is an optional number of targets. If given, the search stops once that
+#       many of the targets have been reached (these are the nearest ones)
+#   prev is an optional list with one value for each node. If given, prev[x] is set to
+#       the node before x on the shortest path from source (-1 for source itself and the
+#       nodes that were not reached). See routePrev
+#   returns a list holding the distance to each node (inf if there is no path,
+#       or if the search stopped before the node was reached)
+def dijkstra(adj, source, targets = None, count = None, prev = None):
+    indptr, indices, weights = adj
+    #plain lists are much faster than numpy arrays for single element access
+    if(not isinstance(indptr, list)):
+        indptr, indices, weights = indptr.tolist(), indices.tolist(), weights.tolist()
+    
+    dist = [np.inf] * (len(indptr)-1)
+    done = [False] * (len(indptr)-1)
+    left = len(set(targets)) if targets is not None else -1
+    if(count is not None):
+        left = min(left, count)
+    isTarget = None
+    if(targets is not None):
+        isTarget = [False] * (len(indptr)-1)
+        for x in targets:
+            isTarget[x] = True
+    
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while(heap and left != 0):
+        d, node = heapq.heappop(heap)
+        if(done[node]):
+            continue
+        done[node] = True
+        if(isTarget is not None and isTarget[node]):
+            left -= 1
+        for x in range(indptr[node], indptr[node+1]):
+            nextNode = indices[x]
+            nextDist = d + weights[x]
+            if(nextDist < dist[nextNode]):
+                dist[nextNode] = nextDist
+                heapq.heappush(heap, (nextDist, nextNode))
+                if(prev is not None):
+                    prev[nextNode] = node
+    
+    #if the search stopped early, nodes still in the heap only have an upper bound
+    if(heap):
+        for x in range(len(dist)):
+            if(not done[x]):
+                dist[x] = np.inf
+                if(prev is not None):
+                    prev[x] = -1
+    return dist
+
+#finds the shortest distances between two sets of nodes without building the full path matrix
+#   adj is the adjacency list from prepAdj
+#   rows is a list of node indices (usually the residential areas)
+#   cols is a list of node indices (usually the grocery stores)
+#   runs dijkstra once from each node in cols, stopping once every node in rows is reached.
+#       The graph is undirected, so the distance from a store to a residential area
+#       is the same as the distance back
+#   dtype is the type used to store the distances (see DTYPE)
+#   returns a len(rows) by len(cols) matrix, where [x][y] is the distance from
+#       rows[x] to cols[y] (nan if there is no path, as in pathGraph)
+def distTable(adj, rows, cols, dtype = np.float64):
+    rows = list(rows)
+    cols = list(cols)
+    adjList = (adj[0].tolist(), adj[1].tolist(), adj[2].tolist())
+    table = np.empty((len(rows), len(cols)), dtype=dtype)
+    for y in range(len(cols)):
+        dist = dijkstra(adjList, cols[y], rows)
+        table[:,y] = [dist[x] for x in rows]
+    table[np.isinf(table)] = np.nan
+    return table
+
+#finds the distances from each node in rows to its nearest few nodes in cols
+#   adj is the adjacency list from prepAdj
+#   rows is a list of node indices (usually the residential areas)
+#   cols is a list of node indices (usually the grocery stores)
+#   num is the number of nearest nodes in cols to find for each row
+#   runs dijkstra from each node in rows, stopping as soon as num nodes
+#       in cols have been reached, so most of the graph is never explored
+#   returns a len(rows) by num matrix, where row x holds the distances from rows[x]
+#       to its num nearest nodes in cols, from shortest to longest
+#       (padded with nan if fewer than num of them can be reached)
+#   the result can be passed to getIsolTable with the same num
+#   dtype is the type used to store the distances (see DTYPE)
+def nearestTable(adj, rows, cols, num, dtype = np.float64):
+    rows = list(rows)
+    cols = list(cols)
+    adjList = (adj[0].tolist(), adj[1].tolist(), adj[2].tolist())
+    table = np.full((len(rows), num), np.nan, dtype=dtype)
+    for x in range(len(rows)):
+        dist = dijkstra(adjList, rows[x], cols, num)
+        near = sorted(dist[y] for y in cols if dist[y] != np.inf)
+        table[x,0:len(near)] = near
+    return table
+
+#the most nodes a witness search may settle while building a contraction hierarchy
+#   (see contractNode). A lower limit builds the hierarchy faster, but may add
+#   shortcuts that are not needed, which makes the queries slower (never wrong)
+WITNESS_LIMIT = 60
+
+#builds a contraction hierarchy, used by the 'hierarchy' engine (see hierarchyTable)
+#   n is the number of nodes, src, dst, wt hold the two nodes and the length of each edge
+#the nodes are removed (contracted) one at a time, least important first. When a node
+#   is removed, a shortcut edge is added between each pair of its neighbours whose
+#   shortest path went through it, so the distances between the nodes left do not change
+#a node's importance is the number of shortcuts removing it would add, less the edges it
+#   would remove, plus the number of its neighbours already removed (so the removed nodes
+#   are spread over the graph). Intersections in chains and dead ends add no shortcuts,
+#   so the intersections are mostly removed first, and ties are broken in favour of
+#   intersections, leaving the grocery stores and residential areas near the top
+#   first is the index of the first intersection (len(G) + len(R))
+#importance changes as nodes are removed, so it is only worked out again when a node
+#   reaches the front of the queue (lazy updates)
+#like the dijkstra engine, if two nodes are joined by more than one edge the shortest is used
+#returns the hierarchy as an (edges by 3) array of upward edges [from, to, length], where
+#   each edge leads from a node to a neighbour that was removed after it (this includes
+#   the shortcuts). Any shortest path first only goes up, then only goes down
+def buildHierarchy(n, src, dst, wt, first = None):
+    first = n if first is None else first
+    nbr = [{} for x in range(n)]
+    for a, b, w in zip(src.tolist(), dst.tolist(), np.asarray(wt, dtype=np.float64).tolist()):
+        if(a != b and w < nbr[a].get(b, np.inf)):
+            nbr[a][b] = w
+            nbr[b][a] = w
+    removed = [0] * n
+    up = []
+    
+    heap = [(contractNode(nbr, x, False) + removed[x], x < first, x) for x in range(n)]
+    heapq.heapify(heap)
+    while(heap):
+        imp, kind, node = heapq.heappop(heap)
+        imp = contractNode(nbr, node, False) + removed[node]
+        if(heap and (imp, kind, node) > heap[0]):
+            heapq.heappush(heap, (imp, kind, node))
+            continue
+        contractNode(nbr, node, True)
+        for x, w in nbr[node].items():
+            up.append((node, x, w))
+            del nbr[x][node]
+            removed[x] += 1
+        nbr[node] = {}
+    return np.array(up, dtype=np.float64).reshape(-1, 3)
+
+#finds the shortcuts needed to remove a node from the hierarchy
+#   nbr is the list of neighbours of each node (with the length of each edge),
+#       holding only the nodes that have not been removed
+#   if add is true, the shortcuts are added to nbr. Otherwise they are only counted
+#for each neighbour a, a limited dijkstra search (a witness search) looks for a path to
+#   each other neighbour b that does not use node and is no longer than going through it.
+#   If none is found, a shortcut from a to b is needed
+#returns the number of shortcuts needed, less the number of edges the node has
+def contractNode(nbr, node, add):
+    edges = list(nbr[node].items())
+    count = 0
+    for x in range(len(edges)):
+        a, wa = edges[x]
+        #only the pairs after a are checked, as the graph is undirected
+        rest = edges[x+1:]
+        if(not rest):
+            break
+        most = wa + max(w for b, w in rest)
+        dist = {a: 0.0}
+        heap = [(0.0, a)]
+        settled = 0
+        while(heap and settled < WITNESS_LIMIT):
+            d, y = heapq.heappop(heap)
+            if(d > dist[y]):
+                continue
+            if(d > most):
+                break
+            settled += 1
+            for z, w in nbr[y].items():
+                if(z != node and d + w < dist.get(z, np.inf)):
+                    dist[z] = d + w
+                    heapq.heappush(heap, (d + w, z))
+        for b, wb in rest:
+            if(dist.get(b, np.inf) > wa + wb):
+                count += 1
+                if(add and wa + wb < nbr[a].get(b, np.inf)):
+                    nbr[a][b] = wa + wb
+                    nbr[b][a] = wa + wb
+    return count - len(edges)
+
+#searches upward from one node in a contraction hierarchy
+#   up is the upward adjacency list (see hierarchyTable) and source is a node index
+#   the search only follows upward edges, so it only reaches a small part of the graph
+#a node is skipped (stalled) if a higher node already reached gives a shorter way to it,
+#   as the search has then not found its shortest path, so no shortest path
+#   continues up through it. This more than halves the nodes reached
+#returns two lists: the nodes reached (and not stalled) and their distances from source
+def upwardSearch(up, source):
+    indptr, indices, weights = up
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    nodes = []
+    dists = []
+    while(heap):
+        d, node = heapq.heappop(heap)
+        if(d > dist[node]):
+            continue
+        edges = range(indptr[node], indptr[node+1])
+        if(any(dist.get(indices[x], np.inf) + weights[x] < d for x in edges)):
+            continue
+        nodes.append(node)
+        dists.append(d)
+        for x in edges:
+            nextNode = indices[x]
+            if(d + weights[x] < dist.get(nextNode, np.inf)):
+                dist[nextNode] = d + weights[x]
+                heapq.heappush(heap, (d + weights[x], nextNode))
+    return nodes, dists
+
+#finds the shortest distances between two sets of nodes from a contraction hierarchy
+#   n is the number of nodes, and hierarchy is the array of upward edges from buildHierarchy
+#   rows is a list of node indices (usually the residential areas)
+#   cols is a list of node indices (usually the grocery stores)
+#   dtype is the type used to store the distances (see DTYPE)
+#every shortest path goes up the hierarchy and then down, and the two halves meet at
+#   its highest node. So an upward search is run from each node in cols, and each node
+#   it reaches keeps a bucket of (column, distance). Then an upward search from each
+#   node in rows checks the buckets of the nodes it reaches, and the shortest total
+#   through any of them is the distance (bucket-based many-to-many search)
+#returns the same matrix as distTable
+def hierarchyTable(n, hierarchy, rows, cols, dtype = np.float64):
+    rows = list(rows)
+    cols = list(cols)
+    edges = np.asarray(hierarchy, dtype=np.float64).reshape(-1, 3)
+    start = edges[:,0].astype(np.int64)
+    order = np.argsort(start, kind='stable')
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(start, minlength=n), out=indptr[1:])
+    up = (indptr.tolist(), edges[order,1].astype(np.int64).tolist(), edges[order,2].tolist())
+    
+    #the buckets, stored the same way as an adjacency list: the entries for
+    #   node x are at positions bucketPtr[x] to bucketPtr[x+1]
+    found = [upwardSearch(up, x) for x in cols]
+    nodes = np.array([x for y in found for x in y[0]], dtype=np.int64)
+    dists = np.array([x for y in found for x in y[1]], dtype=np.float64)
+    owner = np.repeat(np.arange(len(cols)), [len(y[0]) for y in found])
+    order = np.argsort(nodes, kind='stable')
+    bucketPtr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(nodes, minlength=n), out=bucketPtr[1:])
+    bucketCol = owner[order]
+    bucketDist = dists[order]
+    
+    table = np.full((len(rows), len(cols)), np.inf)
+    for x in range(len(rows)):
+        reached, d = upwardSearch(up, rows[x])
+        reached = np.array(reached, dtype=np.int64)
+        size = bucketPtr[reached+1] - bucketPtr[reached]
+        #the positions of every bucket entry of the nodes reached
+        pos = np.repeat(bucketPtr[reached] - np.cumsum(size) + size, size) + np.arange(size.sum())
+        np.minimum.at(table[x], bucketCol[pos], np.repeat(d, size) + bucketDist[pos])
+    table[np.isinf(table)] = np.nan
+    return table.astype(dtype)
+
+#rebuilds the shortest path between two nodes from the next node matrix of pathGraph
+#   nxt is the matrix returned by pathGraph when track is true
+#   start and end are node indices
+#returns the list of node indices on the path, from start to end (empty if there is no path)
+def routeNext(nxt, start, end):
+    if(nxt[start][end] < 0):
+        return []
+    route = [start]
+    while(route[-1] != end and len(route) <= len(nxt)):
+        route.append(int(nxt[route[-1]][end]))
+    return route if route[-1] == end else []
+
+#rebuilds the shortest path to a node from the list of previous nodes filled in by dijkstra
+#   prev is the list passed to dijkstra, and end is a node index
+#returns the list of node indices on the path, from the source of the search to end
+#   (just [end] if end is the source, and empty if end was not reached)
+def routePrev(prev, end):
+    route = [end]
+    while(prev[route[-1]] >= 0 and len(route) <= len(prev)):
+        route.append(int(prev[route[-1]]))
+    route.reverse()
+    return route
+
+#finds the routes from one node to its nearest few grocery stores
+#   only done when asked for, so ranking the residential areas does not pay for it
+#takes in:
+#   adj - the adjacency list (see prepAdj)
+#   node - the node index to start from (usually a residential area)
+#   cols - the node indices of the grocery stores
+#   count - the number of nearest stores to find routes to
+#   path, nxt - optional matrices from pathGraph with track set to true. If given, the
+#       routes are read from them. Otherwise one dijkstra search is run from node,
+#       stopping once count stores are reached, and its previous nodes are kept as
+#       an int32 array (see routePrev)
+#returns a list of [store node index, distance, route] for each store found, nearest first,
+#   where route is the list of node indices from node to the store
+#   (stores that can not be reached are left out)
+def nearestRoutes(adj, node, cols, count, path = None, nxt = None):
+    cols = list(cols)
+    if(path is not None and nxt is not None):
+        dist = np.asarray(path[node], dtype=np.float64)[cols]
+        dist[np.isnan(dist)] = np.inf
+        found = [[cols[x], float(dist[x])] for x in range(len(cols))]
+    else:
+        prev = [-1] * (len(adj[0])-1)
+        dist = dijkstra(adj, node, cols, count, prev)
+        prev = np.array(prev, dtype=np.int32)
+        found = [[x, dist[x]] for x in cols]
+    #python's sort is stable, so stores the same distance away stay in order
+    found = [x for x in sorted(found, key=lambda x: x[1]) if x[1] != np.inf][0:count]
+    for x in found:
+        x.append(routeNext(nxt, node, x[0]) if nxt is not None and path is not None else routePrev(prev, x[0]))
+    return found
+
 #finds the average distance from a node to a range of other nodes
 #takes in the graph and 3 integers (graph indicies):
 #   start is the index of the first element in the range
@@ -177,47 +991,129 @@ def pathGraph(graph):
 #   node is the point of origin
 #   returns the average distance from node to a number of nodes (num)
 #       from graph, in that range (start,stop)
-#   If 
+#   If node has a path to fewer than num of the nodes, the average is taken over
+#       the ones it can reach. If it can reach none of them, returns nan
 def avgDist(graph,start,stop,num,node):
-    hold = []
-    short = []
-    nanCount = 0
-    pathSum = 0
-    
-    #if num is not a valid input
-    if(num > stop-start or num <= 0):
-        sys.exit("    Error: Improper Number of Nodes Requested. You must request a numer of nodes greater than 0 but less than or equal to the amount of G-nodes the graph has.\n Your graph has " + str(stop-start) + " G-nodes.\n You requrested " + str(num) + " G-nodes.\n")  
-    
-    #appends hold with the lengths of all existing paths
-    for x in range(start,stop):
-        if(graph[node][x]!=np.nan):
-            hold.append(graph[node][x])
-    
-    #appends short with each length in order from shortest to longest
-    #after a value has been added, it is set to our infinity approximation
-    val = INF
-    hold.append(val)
-    for y in range(len(hold)):
-        val = np.nanmin(hold)
-        if(val!=INF and val!=np.nan):
-            short.append(val)
-        if(val == np.nan or val=='nan'):
-            continue
+    checkNum(num,stop-start)
+    return nearestAvg(np.asarray(graph,dtype=np.float64)[node:node+1,start:stop],num)[0]
+
+#exits with an error if num is not a valid number of G-nodes to request
+#   count is the number of G-nodes the graph has
+def checkNum(num,count):
+    if(num > count or num <= 0):
+        sys.exit("    Error: Improper Number of Nodes Requested. You must request a numer of nodes greater than 0 but less than or equal to the amount of G-nodes the graph has.\n Your graph has " + str(count) + " G-nodes.\n You requrested " + str(num) + " G-nodes.\n")  
+
+#finds the average distance to the num nearest columns for every row of table at once
+#   table is a matrix of distances, with nan (or INF) where there is no path
+#   num is the number of nearest columns to average over
+#   uses a partial sort (np.partition) on each row, so only the num smallest
+#       values are put in order instead of the whole row
+#   returns an array holding the average for each row. Rows are handled the same
+#       way as avgDist: unreachable columns are skipped, and a row that can
+#       reach no columns gets nan
+def nearestAvg(table,num):
+    dist = np.array(table,dtype=np.float64)
+    dist[np.isnan(dist) | (dist == INF)] = np.inf
+    if(num < dist.shape[1]):
+        dist = np.partition(dist,num-1,axis=1)[:,0:num]
+    #the few remaining values are sorted so they are added from shortest to longest
+    dist.sort(axis=1)
+    
+    found = np.isfinite(dist)
+    count = found.sum(axis=1)
+    dist[~found] = 0
+    #adds one column at a time, the same order avgDist always used (np.sum may
+    #   add them in a different order, which can change the last digit)
+    total = np.zeros(len(dist))
+    for x in range(dist.shape[1]):
+        total += dist[:,x]
+    avg = np.full(len(dist), np.nan)
+    np.divide(total,count,out=avg,where=count>0)
+    return avg
+
+#builds an index of the distances from each residential area to the grocery stores,
+#   so the averages for any number of stores can be found without sorting again
+#   table is a matrix of distances, with nan (or INF) where there is no path
+#returns the index as three arrays:
+#   dist - each row of table sorted from nearest to farthest (np.inf where there is no path)
+#   sums - sums[x][k] is the total of the k nearest distances in row x (so sums[x][0] is 0)
+#   found - the number of columns each row can reach
+#building the index sorts every row once. After that, indexAvg takes the same time
+#   for any number of stores, and storesWithin only searches each row
+def distIndex(table):
+    dist = np.array(table, dtype=np.result_type(np.asarray(table).dtype, np.float32))
+    dist[np.isnan(dist) | (dist == INF)] = np.inf
+    dist.sort(axis=1)
+    found = np.isfinite(dist).sum(axis=1)
+    sums = np.zeros((dist.shape[0], dist.shape[1]+1))
+    np.cumsum(np.where(np.isfinite(dist), dist, 0), axis=1, dtype=np.float64, out=sums[:,1:])
+    return dist, sums, found
+
+#finds the average distance to the num nearest columns for every row, from an index
+#   index is the index from distIndex, and num is the number of columns to average over
+#   gives the same results as nearestAvg(table, num): unreachable columns are skipped,
+#       and a row that can reach no columns gets nan
+def indexAvg(index, num):
+    dist, sums, found = index
+    count = np.minimum(found, num)
+    avg = np.full(len(count), np.nan)
+    np.divide(sums[np.arange(len(count)), count], count, out=avg, where=count>0)
+    return avg
+
+#finds how many columns of each row are within a distance, from an index
+#   index is the index from distIndex
+#   radius is the largest distance to count (one number, or one for each row)
+#   uses a binary search on every row at once, so it takes about log2(columns) steps
+#returns two arrays, with one value for each row:
+#   the number of columns within radius
+#   the average distance to them (nan if there are none)
+def storesWithin(index, radius):
+    dist, sums, found = index
+    rows = np.arange(dist.shape[0])
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), rows.shape)
+    #the answer for each row is between lo and hi
+    lo = np.zeros(len(rows), dtype=np.int64)
+    hi = np.full(len(rows), dist.shape[1], dtype=np.int64)
+    while((lo < hi).any()):
+        mid = (lo + hi) // 2
+        active = lo < hi
+        inside = active & (dist[rows, np.minimum(mid, dist.shape[1]-1)] <= radius)
+        lo[inside] = mid[inside] + 1
+        hi[active & ~inside] = mid[active & ~inside]
+    avg = np.full(len(rows), np.nan)
+    np.divide(sums[rows, lo], lo, out=avg, where=lo>0)
+    return lo, avg
+
+#puts the residential areas in order by their average distance
+#   avg is an array holding the average distance for each residential area,
+#       such as the one returned by nearestAvg
+#   G is the number of grocery store nodes, used to give each residential area its node index
+#   close and top are the same as in getIsolTable
+#   areas with the same average are kept in node order (reversed if close is true)
+#   areas that can not reach any grocery store (an average of nan) are not ranked.
+#       They are all added after the ranked areas, in node order, and do not count towards top
+#   returns a list of [average distance, node index] pairs
+def rankOrder(avg,G,close = False,top = None):
+    avg = np.asarray(avg)
+    key = -avg if close else avg
+    lost = np.flatnonzero(np.isnan(avg))
+    idx = np.flatnonzero(~np.isnan(avg))
+    
+    #when only the first few are wanted, only the areas that can be among them are sorted
+    if(top is not None and top < len(idx)):
+        if(top <= 0):
+            idx = idx[0:0]
         else:
-            hold[hold.index(val)]=INF
-        
-    #handles if the amount of added path lengths are less than the requested number
-    # (this should only be true if the node does not have a path to some of the nodes
-    #  in the start-stop range)
-    if(len(short)<=num):
-        num = len(short)
-    
-    if(num == 0):
-        return 0    
-    #sums the num smallest lengths
-    for z in range(num):
-        pathSum += short[z]
-    return pathSum/num
+            kth = np.partition(key[idx],top-1)[top-1]
+            idx = idx[key[idx] <= kth]
+    
+    if(close):
+        idx = idx[np.lexsort((-idx,key[idx]))]
+    else:
+        idx = idx[np.lexsort((idx,key[idx]))]
+    if(top is not None):
+        idx = idx[0:max(top,0)]
+    return [[a,G+i] for a,i in zip(avg[idx].tolist(),idx.tolist())] + [[np.nan,G+i] for i in lost.tolist()]
 
 #returns an ordered list of all the nodes R ranked by average distance to G nodes
 #takes in:
@@ -226,40 +1122,195 @@ def avgDist(graph,start,stop,num,node):
 #   R, the number of nodes that correspond to residential areas
 #   num, the number of grocery stores to get for each residential area
 #       (prioritizing the nearest grocery stores)
-#   top, the number of elements to return
 #   close, a boolean that returns the nodes with the farthest avg distance if false, and 
 #       the least average distance if true.
 #       By default, this value is set to false
-def getIsol(graph,G,R,num,close = False):
-    hold = []
-    order = []
-    
-    #calculates the average distance to the grocery stores for each residential node
-    for i in range(G,G+R):
-        hold.append([avgDist(graph,0,G,num,i),i])
-    
-    #orders the nodes by the shortest avg distance to num grocery stores
-    for j in range(len(hold)):
-        val = hold[j][0]
-        sIndex = j
-        for k in range(len(hold)):
-            if(val>hold[k][0] and hold[k][0]!=INF):
-                val=hold[k][0]
-                sIndex = k
-        order.append(copy.deepcopy(hold[sIndex]))
-        hold[sIndex][0] = INF
-        
-    #if the user wants the closest instead of farthest
-    if(close):
-        rev = []
-        #copies the list in reverse
-        #probably more efficient ways to do this, maybe fix it later
-        for x in range(len(order)):
-            rev.append(copy.deepcopy(order[len(order)-1-x]))
-        return rev
-    #default setting
+#   top, the number of elements to return
+#       By default, all of them are returned
+def getIsol(graph,G,R,num,close = False,top = None):
+    #only the rows of the residential areas and the columns of the stores are needed
+    return getIsolTable(np.asarray(graph)[G:G+R,0:G],G,num,close,top)
+
+#the same as getIsol, but takes only the residential area by grocery store distances
+#   table is a matrix where [x][y] is the distance from residential area x to store y,
+#       such as the one returned by distTable
+#   G is the number of grocery store nodes, used to give each residential area
+#       its node index in the returned list
+#   num, close and top are the same as in getIsol
+def getIsolTable(table,G,num,close = False,top = None):
+    table = np.asarray(table)
+    checkNum(num,table.shape[1])
+    return rankOrder(nearestAvg(table,num),G,close,top)
+
+#re-calculates the average distance only for the residential areas whose distances changed
+#   avg is the array of averages from nearestAvg before the change
+#   table is the residential area by grocery store distance matrix after the change
+#   changed is an array of booleans, true for each residential area whose distances changed
+#       (see applyDelta)
+#   num is the number of nearest stores to average over
+#   returns the new array of averages, which can be passed to rankOrder
+def updateAvg(avg,table,changed,num):
+    avg = np.array(avg,dtype=np.float64)
+    changed = np.asarray(changed,dtype=bool)
+    if(changed.any()):
+        avg[changed] = nearestAvg(np.asarray(table)[changed],num)
+    return avg
+
+#applies a change to the graph, and updates the distances without solving the whole graph again
+#takes in:
+#   delta, a list describing the change (codes are node codes, lengths may be strings):
+#       ["addStore", code] - node code becomes a grocery store
+#       ["removeStore", code] - node code is no longer a grocery store
+#       ["addEdge", code1, code2, length] - adds a road (if the two nodes are already
+#           joined, the shorter road is used)
+#       ["setEdge", code1, code2, length] - replaces the road between the two nodes
+#       ["removeEdge", code1, code2] - removes the road between the two nodes
+#   N, src, dst, wt - the nodes and edges (see loadFile)
+#   rows - the node indices of the residential areas
+#   cols - the node indices of the grocery stores (one for each column of table)
+#   table - the residential area by grocery store distance matrix
+#   path - optional full path matrix (see pathGraph). If given, it is updated as well
+#roads that are added or get shorter are handled by checking every pair of nodes
+#   for a shorter path through the road (O(N^2) with path, or two searches and
+#   O(R*G) work without it)
+#roads that are removed or get longer only affect the distances whose shortest path
+#   used them. Only those rows of path (or columns of table) are searched again
+#returns src, dst, wt, cols, table, path, changed
+#   changed is an array of booleans, true for each residential area (row of table)
+#       whose distances changed, for use with updateAvg
+def applyDelta(delta,N,src,dst,wt,rows,cols,table,path = None):
+    index = {}
+    for x in range(len(N)):
+        if(N[x] not in index):
+            index[N[x]] = x
+    rows = np.asarray(rows,dtype=np.int64)
+    cols = list(cols)
+    table = np.array(table,dtype=np.float64)
+    if(path is not None):
+        path = np.array(path,dtype=np.float64)
+    kind = delta[0]
+    
+    if(kind == "addStore" or kind == "removeStore"):
+        if(delta[1] not in index):
+            sys.exit("    Error: Unknown Node '" + str(delta[1]) + "' in change " + str(delta) + "\n")
+        node = index[delta[1]]
+        if(kind == "addStore"):
+            if(node in cols):
+                return src, dst, wt, cols, table, path, np.zeros(len(rows),dtype=bool)
+            dist = nodeDist(node,src,dst,wt,len(N),path,rows)
+            col = dist[rows]
+            table = np.column_stack((table,col))
+            cols.append(node)
+        else:
+            if(node not in cols):
+                return src, dst, wt, cols, table, path, np.zeros(len(rows),dtype=bool)
+            col = table[:,cols.index(node)]
+            table = np.delete(table,cols.index(node),axis=1)
+            cols.remove(node)
+        changed = np.isfinite(col)
+        table[np.isinf(table)] = np.nan
+        return src, dst, wt, cols, table, path, changed
+    
+    if(kind not in ("addEdge", "setEdge", "removeEdge")):
+        sys.exit("    Error: Unknown Change '" + str(kind) + "'\n")
+    if(delta[1] not in index or delta[2] not in index):
+        sys.exit("    Error: Unknown Node in change " + str(delta) + "\n")
+    a = index[delta[1]]
+    b = index[delta[2]]
+    
+    #the length of the road between a and b before and after the change
+    same = ((src == a) & (dst == b)) | ((src == b) & (dst == a))
+    old = wt[same].min() if same.any() else np.inf
+    if(kind == "addEdge"):
+        new = min(old, float(delta[3]))
+    elif(kind == "setEdge"):
+        new = float(delta[3])
+    else:
+        new = np.inf
+    
+    #distances from both ends of the road, before the change
+    da = nodeDist(a,src,dst,wt,len(N),path,None if path is not None else np.concatenate((rows,cols)))
+    db = nodeDist(b,src,dst,wt,len(N),path,None if path is not None else np.concatenate((rows,cols)))
+    
+    #updates the edge lists
+    if(kind == "addEdge"):
+        src = np.append(src,a)
+        dst = np.append(dst,b)
+        wt = np.append(wt,float(delta[3]))
+    else:
+        src, dst, wt = src[~same], dst[~same], wt[~same]
+        if(kind == "setEdge"):
+            src = np.append(src,a)
+            dst = np.append(dst,b)
+            wt = np.append(wt,new)
+    
+    if(new == old):
+        return src, dst, wt, cols, table, path, np.zeros(len(rows),dtype=bool)
+    
+    before = table.copy()
+    before[np.isnan(before)] = np.inf
+    colsArr = np.asarray(cols,dtype=np.int64)
+    if(new < old):
+        #every path can now also go through the new road, in either direction
+        if(path is not None):
+            diag = path.diagonal().copy()
+            path[np.isnan(path)] = np.inf
+            np.minimum(path, da[:,None] + new + db[None,:], out=path)
+            np.minimum(path, db[:,None] + new + da[None,:], out=path)
+            np.fill_diagonal(path, diag)
+            path[np.isinf(path)] = np.nan
+            table = path[np.ix_(rows,colsArr)]
+        else:
+            table = np.minimum(before, da[rows][:,None] + new + db[colsArr][None,:])
+            np.minimum(table, db[rows][:,None] + new + da[colsArr][None,:], out=table)
+    else:
+        adj = prepAdjArrays(len(N),src,dst,wt)
+        adjList = (adj[0].tolist(), adj[1].tolist(), adj[2].tolist())
+        if(path is not None):
+            #finds the pairs of nodes whose shortest path used the old road
+            full = path.copy()
+            full[np.isnan(full)] = np.inf
+            used = np.isclose(full, np.minimum(da[:,None] + old + db[None,:], db[:,None] + old + da[None,:]), rtol=1e-12, atol=0)
+            used &= np.isfinite(full)
+            diag = path.diagonal().copy()
+            #the graph is undirected, so each row that is searched again also gives its column
+            for x in np.flatnonzero(used.any(axis=1)):
+                dist = np.array(dijkstra(adjList, int(x)))
+                dist[np.isinf(dist)] = np.nan
+                path[x,:] = dist
+                path[:,x] = dist
+            np.fill_diagonal(path, diag)
+            table = path[np.ix_(rows,colsArr)]
+        else:
+            used = np.isclose(before, np.minimum(da[rows][:,None] + old + db[colsArr][None,:], db[rows][:,None] + old + da[colsArr][None,:]), rtol=1e-12, atol=0)
+            used &= np.isfinite(before)
+            table = before.copy()
+            rowList = rows.tolist()
+            for y in np.flatnonzero(used.any(axis=0)):
+                dist = dijkstra(adjList, cols[y], rowList)
+                table[:,y] = [dist[x] for x in rowList]
+    
+    after = np.array(table)
+    after[np.isnan(after)] = np.inf
+    changed = (after != before).any(axis=1)
+    table = np.array(table)
+    table[np.isinf(table)] = np.nan
+    return src, dst, wt, cols, table, path, changed
+
+#finds the distance from one node to every node, for applyDelta
+#   node is the index of the node
+#   src, dst, wt are the edges and n is the number of nodes
+#   path is the full path matrix, or None. If given, the distances are taken from it
+#   targets is an optional list of node indices; the search may stop once they are reached
+#   returns a numpy array of distances (inf if there is no path)
+def nodeDist(node,src,dst,wt,n,path = None,targets = None):
+    if(path is not None):
+        dist = np.array(path[node],dtype=np.float64)
+        dist[np.isnan(dist)] = np.inf
     else:
-        return order
+        dist = np.array(dijkstra(prepAdjArrays(n,src,dst,wt),node,targets))
+    dist[node] = 0
+    return dist
 
 #outputs a number of results
 #takes in several parameters:
@@ -270,26 +1321,1134 @@ def getIsol(graph,G,R,num,close = False):
 #   gNum is the number of G-nodes
 #   top is the number of results to output
 #       by default this is set to the length of order (printing all results)
+#residential areas that can not reach any grocery store are listed after the
+#   results as unreachable, instead of being given a distance
 def getTop(R, order, gNum, top = INF):
-    print("Residential Area     Average Distance to Grocery Store")
+    print(formatTop(R, order, gNum, top))
+
+#the same as getTop, but returns the text instead of printing it
+#   the whole text is built as a list of lines and joined once, so writing it
+#   to a file is a single write
+def formatTop(R, order, gNum, top = INF):
+    lines = ["Residential Area     Average Distance to Grocery Store"]
+    
+    #rankOrder puts the unreachable areas (with an average of nan) at the end
+    ranked = len(order)
+    while(ranked > 0 and order[ranked-1][0] != order[ranked-1][0]):
+        ranked -= 1
     
+    #the name of the area (leaving out the R### code) followed by a space, padded
+    #   to 30 characters, then the average distance
+    line = "{:<30}{:.4f} km".format
     #default setting, prints all 
-    if top > len(order):
-        top = len(order)
-    for x in range(top):
-        printStr = ""
-        numStr = ""
+    for avg, node in order[0:min(top, ranked)]:
+        name = R[node-gNum]
+        lines.append(line(" ".join(name[1:]) + " " if len(name) > 1 else "", avg/1000))
+    
+    if(ranked < len(order)):
+        lines.append("\nUnreachable (No Path to Any Grocery Store):")
+        for avg, node in order[ranked:]:
+            lines.append(" ".join(str(y) for y in R[node-gNum][1:]))
+    return "\n".join(lines)
+
+#the file formats that exportResults can write
+EXPORTS = ['csv', 'npz', 'npy']
+
+#writes the results of a run in bulk, for use in other programs (such as GIS tools)
+#takes in:
+#   base - the start of the name of each file written (e.g. "results/town")
+#   fmt - one of EXPORTS
+#   R, G - the residential areas and grocery stores (split on spaces)
+#   order - the ranking from rankOrder, holding every residential area
+#   table - optional residential area by grocery store distance matrix, written as well
+#   nearest - optional nearest grocery stores to each residential area, written as well
+#       (the pair of arrays returned by nearestStores)
+#the files written hold (distances are in the units of the input file, and missing
+#   distances are empty in CSV files and nan otherwise):
+#   csv - <base>.ranking.csv: rank, area code, area name and average distance
+#         <base>.distances.csv: one row for each area and one column for each store
+#         <base>.nearest.csv: for each area, its nearest stores and their distances
+#   npz - <base>.npz: one compressed file holding the arrays
+#         areas, stores - the codes of the residential areas and grocery stores
+#         ranked - the index (in areas) of each area, in ranked order
+#         average - the average distance of each area
+#         distances - the table (if given)
+#         nearest, nearest_distances - the index (in stores) of the nearest stores to
+#             each area (-1 if there are fewer), and their distances (if nearest is given)
+#   npy - the same arrays as npz, each in its own file named <base>.<array>.npy. Large
+#         arrays are written a block at a time, and can be read back without loading
+#         them into memory with np.load(file, mmap_mode='r')
+#returns the list of files written
+def exportResults(base, fmt, R, G, order, table = None, nearest = None):
+    gNum = len(G)
+    areas = [x[0] for x in R]
+    stores = [x[0] for x in G]
+    ranked = np.array([x[1] - gNum for x in order], dtype=np.int64)
+    average = np.full(len(R), np.nan)
+    average[ranked] = [x[0] for x in order]
+    arrays = {"areas": np.array(areas, dtype=str), "stores": np.array(stores, dtype=str),
+              "ranked": ranked, "average": average}
+    if(nearest is not None):
+        arrays["nearest"], arrays["nearest_distances"] = nearest
+    
+    if(fmt == 'csv'):
+        files = [base + ".ranking.csv"]
+        with open(files[0], 'w', newline='', buffering=1<<20) as file:
+            rank = [x + 1 if average[ranked[x]] == average[ranked[x]] else "" for x in range(len(ranked))]
+            csv.writer(file).writerows([["rank","area","name","average"]] +
+                                       [[rank[x], areas[y], " ".join(R[y][1:]), blankNan(average[y])]
+                                        for x, y in enumerate(ranked.tolist())])
+        if(table is not None):
+            files.append(base + ".distances.csv")
+            with open(files[-1], 'w', newline='', buffering=1<<20) as file:
+                writer = csv.writer(file)
+                writer.writerow(["area"] + stores)
+                for x in range(0, len(areas), 4096):
+                    block = blankNan(table[x:x+4096])
+                    writer.writerows([[areas[x+y]] + block[y] for y in range(len(block))])
+        if("nearest" in arrays):
+            files.append(base + ".nearest.csv")
+            names = np.array(stores + [""], dtype=object)
+            with open(files[-1], 'w', newline='', buffering=1<<20) as file:
+                count = arrays["nearest"].shape[1]
+                writer = csv.writer(file)
+                writer.writerow(["area"] + [y + str(x + 1) for x in range(count) for y in ("store ", "distance ")])
+                #-1 (no store) picks the empty name at the end of names
+                found = names[arrays["nearest"]]
+                dist = blankNan(arrays["nearest_distances"])
+                writer.writerows([[areas[x]] + [y for pair in zip(found[x], dist[x]) for y in pair] for x in range(len(areas))])
+        return files
+    elif(fmt == 'npz'):
+        if(table is not None):
+            arrays["distances"] = np.asarray(table)
+        np.savez_compressed(base + ".npz", **arrays)
+        return [base + ".npz"]
+    elif(fmt == 'npy'):
+        files = []
+        if(table is not None):
+            files.append(base + ".distances.npy")
+            out = np.lib.format.open_memmap(files[-1], mode='w+', dtype=np.asarray(table[0:0]).dtype, shape=(len(areas), len(stores)))
+            for x in range(0, len(areas), 4096):
+                out[x:x+4096] = table[x:x+4096]
+            out.flush()
+            del out
+        for name in arrays:
+            files.append(base + "." + name + ".npy")
+            np.save(files[-1], arrays[name])
+        return files
+    sys.exit("    Error: Unknown Export Format '" + str(fmt) + "'. Use one of: " + ", ".join(EXPORTS) + "\n")
+
+#turns nan into an empty string, for writing to CSV files
+#   values is a number or an array of numbers
+#returns the number, or the array as a list (of lists)
+def blankNan(values):
+    values = np.asarray(values, dtype=np.float64)
+    if(values.ndim == 0):
+        return "" if np.isnan(values) else float(values)
+    found = values.astype(object)
+    found[np.isnan(values)] = ""
+    return found.tolist()
+
+#finds the nearest few grocery stores to each residential area
+#   table is the residential area by grocery store distance matrix
+#   count is the number of stores to find for each area
+#returns two arrays with one row for each area, in order from nearest:
+#   the column (in table) of each store, or -1 if the area can reach fewer stores
+#   the distance to each store, or nan
+def nearestStores(table, count):
+    dist = np.array(table, dtype=np.float64)
+    dist[np.isnan(dist)] = np.inf
+    count = min(count, dist.shape[1])
+    if(count < dist.shape[1]):
+        idx = np.argpartition(dist, count-1, axis=1)[:,0:count]
+    else:
+        idx = np.tile(np.arange(dist.shape[1]), (len(dist), 1))
+    found = np.take_along_axis(dist, idx, axis=1)
+    sort = np.argsort(found, axis=1, kind='stable')
+    idx = np.take_along_axis(idx, sort, axis=1).astype(np.int32)
+    found = np.take_along_axis(found, sort, axis=1)
+    idx[np.isinf(found)] = -1
+    found[np.isinf(found)] = np.nan
+    return idx, found
+
+#the folder where computed distances are saved, so that reading the same graph
+#   again does not have to repeat the work. Set to None to turn the cache off
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "access-graph")
+#the most disk space the cache may use, in bytes
+#   when it is full, the results that were used least recently are deleted
+CACHE_LIMIT = 2 * 1024**3
+#must be changed whenever an engine is changed in a way that affects its results,
+#   so results saved by the old version are not used
+ENGINE_VERSION = 2
+
+#gets the name a result is saved under in the cache
+#   N is the list of node codes, and src, dst, wt are the edges (see loadFile)
+#   extra is a list of anything else the result depends on (such as the engine name)
+#the name is a hash of the graph, so it only depends on the nodes and edges themselves,
+#   not on the name of the input file or how it was formatted
+#the edges are put in a standard form first: the smaller node of each edge comes first,
+#   the edges are sorted, and repeated copies are dropped (a compiled file lists each
+#   edge once in each direction). So listing the edges in a different order, or reading
+#   the compiled version of a file instead of the text one, gives the same name
+def cacheKey(N, src, dst, wt, extra = []):
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    wt = np.asarray(wt, dtype=np.float64)
+    low = np.minimum(src, dst)
+    high = np.maximum(src, dst)
+    order = np.lexsort((wt, high, low))
+    low, high, wt = low[order], high[order], wt[order]
+    keep = np.ones(len(low), dtype=bool)
+    keep[1:] = (low[1:] != low[:-1]) | (high[1:] != high[:-1]) | (wt[1:] != wt[:-1])
+    
+    key = hashlib.sha256()
+    key.update(json.dumps([ENGINE_VERSION] + [str(x) for x in extra]).encode("utf-8"))
+    key.update("\n".join(N).encode("utf-8"))
+    key.update(np.ascontiguousarray(low[keep]).tobytes())
+    key.update(np.ascontiguousarray(high[keep]).tobytes())
+    key.update(np.ascontiguousarray(wt[keep]).tobytes())
+    return key.hexdigest()
+
+#gets a result from the cache
+#   returns the saved array (memory-mapped, read only), or None if it is not in the cache
+def cacheLoad(key):
+    if(CACHE_DIR is None):
+        return None
+    name = os.path.join(CACHE_DIR, key + ".npy")
+    try:
+        result = np.load(name, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    #marks the result as recently used (a read-only cache can still be read from)
+    try:
+        os.utime(name)
+    except OSError:
+        pass
+    return result
+
+#saves a result to the cache, then deletes the least recently used
+#   results until the cache is within CACHE_LIMIT
+#   result is a numpy array. A result larger than CACHE_LIMIT on its own is not saved,
+#   and the result just saved is never the one deleted
+def cacheStore(key, result):
+    result = np.asarray(result)
+    if(CACHE_DIR is None or result.nbytes > CACHE_LIMIT):
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        name = os.path.join(CACHE_DIR, key + ".npy")
+        #writes to a temporary file first, so another run never sees a partial file
+        temp = name + "." + str(os.getpid()) + ".tmp"
+        with open(temp, "wb") as file:
+            np.save(file, result)
+        os.replace(temp, name)
+        
+        files = []
+        for x in os.listdir(CACHE_DIR):
+            if(x.endswith(".npy") and x != key + ".npy"):
+                info = os.stat(os.path.join(CACHE_DIR, x))
+                files.append((info.st_mtime, info.st_size, x))
+        files.sort()
+        total = sum(x[1] for x in files) + os.stat(name).st_size
+        for x in files:
+            if(total <= CACHE_LIMIT):
+                break
+            os.remove(os.path.join(CACHE_DIR, x[2]))
+            total -= x[1]
+    except OSError:
+        #the cache only saves time, so the program carries on without it
+        pass
+
+#gets a result from the cache, or computes and saves it if it is not there
+#   key is the name from cacheKey
+#   solve is a function (with no parameters) that computes the result
+def cached(key, solve):
+    result = cacheLoad(key)
+    if(result is None):
+        result = solve()
+        cacheStore(key, result)
+    return result
+
+#marks the start of a compiled (binary) graph file
+BINARY_MAGIC = b"AGRAPH01"
+
+#writes a graph to a compiled (binary) file, which loads much faster than a text file
+#   outFile is the name of the file to write
+#   G, R, I are the lists of nodes, split on spaces (see loadFile)
+#   adj is the adjacency list from prepAdj
+#   table is an optional matrix of residential area to grocery store distances
+#       (see distTable) to store with the graph
+#the file holds:
+#   the 8 byte BINARY_MAGIC marker
+#   the length of the header, as an 8 byte integer
+#   the header, which describes where each array is stored, in JSON
+#   the arrays themselves, each starting on a 64 byte boundary so they can be memory-mapped
+#       nodes - the node lines (i.e. "R001 RA One") joined by newlines, in G, R, I order
+#       indptr, indices, weights - the adjacency list
+#       table - the distance table, if one was given
+def saveBinary(outFile, G, R, I, adj, table = None):
+    nodes = "\n".join(" ".join(x) for x in G + R + I).encode("utf-8")
+    arrays = {"nodes": np.frombuffer(nodes, dtype=np.uint8),
+              "indptr": np.asarray(adj[0], dtype=np.int64),
+              "indices": np.asarray(adj[1]),
+              "weights": np.asarray(adj[2], dtype=np.float64)}
+    if(table is not None):
+        arrays["table"] = np.asarray(table, dtype=np.float64)
+    
+    #offsets are counted from the end of the header
+    header = {"version": 1, "G": len(G), "R": len(R), "I": len(I), "arrays": {}}
+    offset = 0
+    for name in arrays:
+        header["arrays"][name] = {"dtype": arrays[name].dtype.str, "shape": list(arrays[name].shape), "offset": offset}
+        offset += -(-arrays[name].nbytes // 64) * 64
+    text = json.dumps(header).encode("utf-8")
+    #pads the header so the first array is also on a 64 byte boundary
+    text += b" " * (-(len(text) + 16) % 64)
+    
+    with open(outFile, "wb") as file:
+        file.write(BINARY_MAGIC)
+        file.write(len(text).to_bytes(8, "little"))
+        file.write(text)
+        start = file.tell()
+        for name in arrays:
+            file.seek(start + header["arrays"][name]["offset"])
+            file.write(arrays[name].tobytes())
+
+#returns true if inFile is a compiled (binary) graph file
+def isBinary(inFile):
+    with open(inFile, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+#opens a compiled (binary) graph file written by saveBinary
+#   the arrays are memory-mapped rather than read, so opening even a very large
+#   graph is almost instant, and the data is only read from disk when it is used
+#returns a dictionary holding:
+#   G, R, I - the number of each type of node
+#   nodes, indptr, indices, weights - the arrays described in saveBinary
+#   table - the stored distance table, or None if the file does not have one
+def loadBinary(inFile):
+    if (not os.path.exists(inFile)):
+        sys.exit("    Error: Invalid Input File Name: '" + inFile + "' could not be found.")
+    with open(inFile, "rb") as file:
+        if(file.read(len(BINARY_MAGIC)) != BINARY_MAGIC):
+            sys.exit("    Error: '" + inFile + "' is not a compiled graph file.\n")
+        size = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(size).decode("utf-8"))
+    
+    start = len(BINARY_MAGIC) + 8 + size
+    data = {"G": header["G"], "R": header["R"], "I": header["I"], "table": None}
+    for name, info in header["arrays"].items():
+        if(0 in info["shape"]):
+            #np.memmap can not map an empty array
+            data[name] = np.empty(info["shape"], dtype=info["dtype"])
+        else:
+            data[name] = np.memmap(inFile, dtype=info["dtype"], mode="r", offset=start + info["offset"], shape=tuple(info["shape"]))
+    return data
+
+#gets the lists of nodes from a compiled graph file opened with loadBinary
+#   returns G, R, I, N in the same form as loadFile
+def binaryNodes(data):
+    lines = bytes(data["nodes"]).decode("utf-8").split("\n")
+    nodes = [x.split() for x in lines] if lines != [""] else []
+    G = nodes[0:data["G"]]
+    R = nodes[data["G"]:data["G"]+data["R"]]
+    I = nodes[data["G"]+data["R"]:]
+    N = []
+    loadNodes(G,R,I,N)
+    return G, R, I, N
+
+#compiles a text input file into a binary graph file (see saveBinary)
+#   inFile is the text file to read, outFile is the binary file to write
+#   if table is true, the residential area to grocery store distances are
+#       computed (with the dijkstra engine) and stored in the file as well
+def compileFile(inFile, outFile, table = False):
+    G, R, I, N, src, dst, wt = loadFile(inFile)
+    adj = prepAdjArrays(len(N),src,dst,wt)
+    dist = None
+    if(table):
+        dist = distTable(adj,range(len(G),len(G)+len(R)),range(len(G)))
+    saveBinary(outFile, G, R, I, adj, dist)
+
+#profile reports record how long each stage of a run takes and how much memory it uses
+#   a report is a dictionary made by startProfile. Each stage of the run is wrapped in
+#   profileStage, and the report is written to a JSON file by finishProfile
+#functions that take a report do nothing extra when it is None (the default)
+
+#starts a profile report
+#   cprofStage is the name of one stage to also run under cProfile (or None)
+#   memory is true to track memory with tracemalloc from here until finishProfile.
+#       This slows down python code (numpy is much less affected), so it can be
+#       turned off when only the times are wanted
+def startProfile(cprofStage = None, memory = True):
+    if(memory):
+        tracemalloc.start()
+    return {"version": __version__, "python": platform.python_version(), "numpy": np.__version__,
+            "sizes": {}, "stages": [], "cprofile": cprofStage, "profiler": None}
+
+#records one stage of a run in report
+#   use as: with profileStage(report, "name"):
+#for each stage, the report holds:
+#   seconds - the wall clock time taken
+#   traced_peak_bytes - the most memory held by python and numpy during the stage (tracemalloc)
+#   traced_change_bytes - the memory still held after the stage, less the memory held before it
+#       (both are None if startProfile was not tracking memory)
+#   max_rss_bytes - the most memory the process has used so far (the operating system's
+#       count, which includes memory tracemalloc can not see)
+@contextlib.contextmanager
+def profileStage(report, name):
+    if(report is None):
+        yield
+        return
+    profiler = None
+    if(report["cprofile"] == name):
+        profiler = cProfile.Profile()
+        report["profiler"] = profiler
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    if(profiler is not None):
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if(profiler is not None):
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        now, peak = tracemalloc.get_traced_memory()
+        tracing = tracemalloc.is_tracing()
+        report["stages"].append({"stage": name, "seconds": round(seconds, 6), "traced_peak_bytes": peak if tracing else None,
+                                 "traced_change_bytes": now - before if tracing else None, "max_rss_bytes": maxRss()})
+
+#adds sizes (such as the number of nodes) to report
+#   values is a dictionary of names and values. A later value replaces an earlier one
+def profileSizes(report, values):
+    if(report is not None):
+        report["sizes"].update(values)
+
+#the most memory the process has used, in bytes (None if it is not known)
+def maxRss():
+    if(resource is None):
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #linux counts in kilobytes, macOS in bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+#writes report to reportFile as JSON, and stops tracking memory
+#   if a stage was run under cProfile, its statistics are written next to reportFile,
+#       as "<report name>.<stage>.prof" (open them with the pstats module or a viewer such as snakeviz)
+#returns the report
+def finishProfile(report, reportFile):
+    if(tracemalloc.is_tracing()):
+        tracemalloc.stop()
+    profiler = report.pop("profiler")
+    if(profiler is not None):
+        report["cprofile_file"] = os.path.splitext(reportFile)[0] + "." + report["cprofile"] + ".prof"
+        profiler.dump_stats(report["cprofile_file"])
+    with open(reportFile, "w") as file:
+        json.dump(report, file, indent=2)
+    return report
+
+#reads a text or compiled (binary) input file
+#returns G, R, I, N, src, dst, wt, adj, stored
+#   G, R, I, N, src, dst, wt are the same as in loadFile
+#   adj is the adjacency list (see prepAdj)
+#   stored is the distance table saved in a compiled file, or None
+def readGraph(inFile):
+    if(os.path.exists(inFile) and isBinary(inFile)):
+        data = loadBinary(inFile)
+        G, R, I, N = binaryNodes(data)
+        adj = (data["indptr"], data["indices"], data["weights"])
+        src, dst, wt = adjEdges(adj)
+        return G, R, I, N, src, dst, wt, adj, data["table"]
+    G, R, I, N, src, dst, wt = loadFile(inFile)
+    return G, R, I, N, src, dst, wt, prepAdjArrays(len(N),src,dst,wt), None
+
+#gets the residential area by grocery store distance table for a graph, using the
+#   table stored in a compiled file or the cache if there is one, and the
+#   dijkstra engine otherwise
+#   takes the values returned by readGraph
+#   dtype is the type used to store the distances
+def baseTable(G, R, N, src, dst, wt, adj, stored = None, dtype = np.float64):
+    dtype = np.dtype(dtype)
+    if(stored is not None):
+        return np.array(stored, dtype=dtype)
+    return np.array(cached(cacheKey(N,src,dst,wt,['dijkstra',len(G),len(R)] + ([] if dtype == np.float64 else [dtype.name])),
+                           lambda: distTable(adj,range(len(G),len(G)+len(R)),range(len(G)),dtype)))
+
+#solves the shortest paths for a graph with the given engine
+#   takes the values returned by readGraph, and the engine name (see ENGINES)
+#   dtype is the type used to store the distances (by default, DTYPE)
+#   uses the distances stored in a compiled file, or saved in the cache, if there are any
+#the adjacency matrix is only built for the engines that need it, and is turned
+#   into the path matrix in place, so only one n by n matrix is ever held
+#if the graph is in more than one piece, each piece is solved on its own (see componentTable)
+#returns path, table
+#   path is the full path matrix (None for engines that do not build it, or
+#       when the graph was solved in pieces)
+#   table is the residential area by grocery store distance matrix
+#       (None for the nearest engine, as its distances depend on the number of
+#       stores to check. See rankTable)
+#report is a profile report to record each stage in (see startProfile)
+def solveGraph(G, R, N, src, dst, wt, adj, stored, engine, dtype = None, report = None):
+    dtype = np.dtype(DTYPE if dtype is None else dtype)
+    profileSizes(report, {"engine": engine, "dtype": dtype.name})
+    if(stored is not None and engine != 'nearest'):
+        #the file already holds the residential area to grocery store distances
+        return None, np.array(stored, dtype=dtype)
+    elif(engine == 'dijkstra'):
+        #only the residential area to grocery store distances are computed,
+        #   so there is no adjacency matrix or full path matrix
+        with profileStage(report, "distTable"):
+            return None, baseTable(G,R,N,src,dst,wt,adj,dtype=dtype)
+    elif(engine == 'nearest'):
+        return None, None
+    elif(engine == 'hierarchy'):
+        #the hierarchy only depends on the graph, so it is saved and reused even when
+        #   the table is not (e.g. after it is deleted from a full cache)
+        with profileStage(report, "hierarchyTable"):
+            return None, cached(cacheKey(N,src,dst,wt,['hierarchy',len(G),len(R),dtype.name]),
+                                lambda: hierarchyTable(len(N),cached(cacheKey(N,src,dst,wt,['hierarchy',len(G)+len(R)]),
+                                                                     lambda: buildHierarchy(len(N),src,dst,wt,len(G)+len(R))),
+                                                       range(len(G),len(G)+len(R)),range(len(G)),dtype))
+    with profileStage(report, "findComponents"):
+        label = findComponents(len(N), src, dst)
+    profileSizes(report, {"components": int(label.max()) + 1 if len(N) else 0})
+    if(len(N) and label.max() > 0):
+        with profileStage(report, "componentTable"):
+            return None, cached(cacheKey(N,src,dst,wt,[engine,dtype.name,'components',len(G),len(R)]),
+                                lambda: componentTable(len(G),len(R),src,dst,wt,label,engine,dtype))
+    profileSizes(report, {"matrix shape": [len(N), len(N)]})
+    path = fullPath(N,src,dst,wt,engine,dtype,report)
+    return path, path[len(G):len(G)+len(R),0:len(G)]
+
+#gets the Floyd-Warshall matrix of the whole graph from the adjacency matrix
+#   (or the saved copy, if this graph has been solved before)
+#   N is the list of node codes, and src, dst, wt are the edges (see loadFile)
+#   engine must be one of the engines that solve the full matrix ('numpy', 'blocked' or 'loop')
+#   dtype and report are the same as in solveGraph
+def fullPath(N, src, dst, wt, engine, dtype, report = None):
+    return cached(cacheKey(N,src,dst,wt,[engine,dtype.name]),
+                  lambda: densePath(len(N),src,dst,wt,engine,dtype,report))
+
+#builds the adjacency matrix and solves it with a dense engine, for solveGraph
+#   n is the number of nodes, src, dst, wt hold the edges
+#   engine, dtype and report are the same as in solveGraph
+def densePath(n, src, dst, wt, engine, dtype, report = None):
+    with profileStage(report, "prepGraph"):
+        graph = prepGraphArrays(n,src,dst,wt,dtype)
+    with profileStage(report, "pathGraph"):
+        return pathGraph(graph,engine,True)
+
+#solves each piece (component) of a graph on its own, and builds the residential
+#   area by grocery store distance table from them
+#   gNum and rNum are the number of grocery stores and residential areas
+#   src, dst, wt hold the two nodes and the length of each edge
+#   label is the component of each node (see findComponents)
+#   engine and dtype are the same as in solveGraph
+#the work for each component grows with the cube of its size, so solving the pieces
+#   apart is much faster than solving the whole graph at once. Components without
+#   both a grocery store and a residential area are skipped, and the rest are solved
+#   at the same time using THREADS threads
+#residential areas with no grocery store in their component are left as nan (no path)
+def componentTable(gNum, rNum, src, dst, wt, label, engine, dtype):
+    table = np.full((rNum, gNum), np.nan, dtype=dtype)
+    parts = np.intersect1d(label[:gNum], label[gNum:gNum+rNum])
+    with concurrent.futures.ThreadPoolExecutor(THREADS) as pool:
+        jobs = [pool.submit(solveComponent, gNum, rNum, src, dst, wt, label, x, engine, dtype) for x in parts.tolist()]
+        for x in jobs:
+            stores, areas, dist = x.result()
+            table[np.ix_(areas - gNum, stores)] = dist
+    return table
+
+#solves one component for componentTable
+#   part is the number of the component to solve, the rest is the same as in componentTable
+#returns the node indices of its grocery stores and residential areas, and the
+#   distances between them
+def solveComponent(gNum, rNum, src, dst, wt, label, part, engine, dtype):
+    #the nodes are kept in order, so the stores come first, then the residential areas
+    nodes = np.flatnonzero(label == part)
+    local = np.zeros(len(label), dtype=np.int64)
+    local[nodes] = np.arange(len(nodes))
+    keep = label[src] == part
+    path = pathGraph(prepGraphArrays(len(nodes),local[src[keep]],local[dst[keep]],wt[keep],dtype),engine,True)
+    g = int((nodes < gNum).sum())
+    r = int((nodes < gNum + rNum).sum()) - g
+    return nodes[0:g], nodes[g:g+r], path[g:g+r,0:g]
+
+#gets the table to rank for a number of stores to check
+#   table is the table from solveGraph. If it is None (the nearest engine),
+#       the num nearest stores to each residential area are found instead
+#   the other parameters are the values returned by readGraph
+#   dtype is the type used to store the distances (by default, DTYPE)
+def rankTable(G, R, N, src, dst, wt, adj, table, num, dtype = None):
+    if(table is not None):
+        return table
+    dtype = np.dtype(DTYPE if dtype is None else dtype)
+    #the nearest engine only searches until num stores are found
+    return cached(cacheKey(N,src,dst,wt,['nearest',len(G),len(R),num,dtype.name]),
+                  lambda: nearestTable(adj,range(len(G),len(G)+len(R)),range(len(G)),num,dtype))
+
+#reads one input file and writes its results to a file, without the menus
+#   inFile is the input file (text or compiled) and outFile is the file to write
+#   num is the number of nearest grocery stores to check
+#   top is the number of residential areas to output
+#   close is true to list the longest average distances first
+#   engine is the shortest path engine to use (see ENGINES)
+#   dtype is the type used to store the distances (by default, DTYPE)
+#   simplify is true to remove the intersections that do not change any distances
+#       before solving (see simplifyGraph)
+#   profile is true to write a profile report of each stage next to outFile, as
+#       "<output name>.profile.json" (see startProfile)
+#   cprofStage is the name of one stage to also run under cProfile (this turns profile on)
+#   profileMemory is false to leave memory out of the profile report, so the times are
+#       not slowed down by tracemalloc
+#   export is one of EXPORTS to also write the whole ranking to files starting with
+#       the output name (see exportResults), or None
+#   exportTable is true to export the full residential area by grocery store distances as well
+#   exportNearest is true to export the num nearest grocery stores to each residential area as well
+#returns outFile, and the number of [nodes, edges] removed by simplifyGraph
+def runFile(inFile, outFile, num, top = INF, close = True, engine = 'numpy', dtype = None, simplify = True,
+            profile = False, cprofStage = None, profileMemory = True, export = None, exportTable = False, exportNearest = False):
+    report = startProfile(cprofStage, profileMemory) if(profile or cprofStage is not None) else None
+    with profileStage(report, "readGraph"):
+        G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+    profileSizes(report, {"file": inFile, "grocery stores": len(G), "residential areas": len(R),
+                          "intersections": len(I), "edges": int(len(adj[1]) // 2)})
+    removed = [0, 0]
+    if(simplify):
+        with profileStage(report, "simplifyGraph"):
+            I, N, src, dst, wt, adj, removed = simplifyGraph(G,R,I,N,src,dst,wt,adj)
+        profileSizes(report, {"intersections after simplifying": len(I), "edges after simplifying": int(len(src))})
+    path, table = solveGraph(G,R,N,src,dst,wt,adj,stored,engine,dtype,report)
+    #if the requested number of grocery stores is greater than the number
+    #   present in the data set, sets it to all
+    num = min(num, len(G))
+    with profileStage(report, "getIsol"):
+        #exports hold every residential area, not just the top ones
+        order = getIsolTable(rankTable(G,R,N,src,dst,wt,adj,table,num,dtype),len(G),num,close,top if export is None else None)
+    with profileStage(report, "getTop"):
+        with open(outFile,'w') as file:
+            file.write(formatTop(R,order,len(G),top) + "\n")
+    if(export is not None):
+        with profileStage(report, "export"):
+            if((exportTable or exportNearest) and table is None):
+                #the nearest engine does not find every distance, so they are found here
+                table = baseTable(G,R,N,src,dst,wt,adj,stored,dtype if dtype is not None else DTYPE)
+            exportResults(os.path.splitext(outFile)[0],export,R,G,order,table if exportTable else None,
+                          nearestStores(table,num) if exportNearest else None)
+    if(report is not None):
+        finishProfile(report, os.path.splitext(outFile)[0] + ".profile.json")
+    return outFile, removed
+
+#finds the input files for runFiles
+#   names is a list of file names, folders (every .txt and .agb file in the folder
+#       is used, except .out.txt result files) and patterns such as "graphs/*.txt"
+#returns the list of input files, in order and without repeats
+def findInputs(names):
+    found = []
+    for name in names:
+        if(os.path.isdir(name)):
+            #skips result files written by an earlier run
+            files = sorted([x for x in glob.glob(os.path.join(name, "*.txt")) if not x.endswith(".out.txt")]
+                           + glob.glob(os.path.join(name, "*.agb")))
+        elif(glob.has_magic(name)):
+            files = sorted(glob.glob(name))
+        else:
+            files = [name]
+        for x in files:
+            if(x not in found):
+                found.append(x)
+    return found
+
+#runs runFile on many input files at once, one worker process per file
+#   inFiles is the list of input files
+#   output is the file to write to if there is only one input file. Otherwise it is
+#       a folder, and each result is written to "<input name>.out.txt" in it
+#       (by default, each result is written next to its input file)
+#   workers is the number of processes to use (by default, one per core)
+#   num, top, close, engine, dtype, simplify, profile, cprofStage, export, exportTable
+#       and exportNearest are the same as in runFile
+#returns a list of [input file, output file, error message (or None), [nodes, edges] removed]
+def runFiles(inFiles, output = None, num = 5, top = INF, close = True, engine = 'numpy', workers = None, dtype = None, simplify = True,
+             profile = False, cprofStage = None, export = None, exportTable = False, exportNearest = False):
+    outFiles = []
+    for x in inFiles:
+        if(output is not None and len(inFiles) == 1 and not os.path.isdir(output)):
+            outFiles.append(output)
+        else:
+            folder = output if output is not None else os.path.dirname(x)
+            outFiles.append(os.path.join(folder, os.path.splitext(os.path.basename(x))[0] + ".out.txt"))
+    if(output is not None and (len(inFiles) > 1 or os.path.isdir(output))):
+        os.makedirs(output, exist_ok=True)
+    
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        jobs = [pool.submit(runFile, inFiles[x], outFiles[x], num, top, close, engine, dtype, simplify, profile, cprofStage,
+                            export=export, exportTable=exportTable, exportNearest=exportNearest) for x in range(len(inFiles))]
+        for x in range(len(jobs)):
+            try:
+                results.append([inFiles[x], outFiles[x], None, jobs[x].result()[1]])
+            #the other files carry on if one of them has an error
+            except SystemExit as error:
+                results.append([inFiles[x], outFiles[x], str(error).strip(), None])
+            except Exception as error:
+                results.append([inFiles[x], outFiles[x], repr(error), None])
+    return results
+
+#reads a file of scenarios for runScenarios
+#   each line holds one scenario: a name, a colon, then one or more changes
+#   separated by semicolons. Each change is written as in applyDelta, e.g.
+#       Store at I002: addStore I002
+#       Close R001 road: removeEdge R001 R002; addEdge R001 I002 40
+#   blank lines and lines starting with # are skipped
+#returns a list of [name, list of changes]
+def readScenarios(scenFile):
+    if (not os.path.exists(scenFile)):
+        sys.exit("    Error: Invalid Scenario File Name: '" + scenFile + "' could not be found.")
+    with open(scenFile, "r") as file:
+        return parseScenarios(file, scenFile)
+
+#reads the scenarios from a list of lines, in the same form as readScenarios
+#   lines is any list (or file) of lines
+#   scenFile is the name to give in error messages
+#returns a list of [name, list of changes]
+def parseScenarios(lines, scenFile):
+    #the number of values each type of change takes
+    sizes = {"addStore": 2, "removeStore": 2, "addEdge": 4, "setEdge": 4, "removeEdge": 3}
+    scenarios = []
+    ln = 0
+    for line in lines:
+        ln += 1
+        if(not line.strip() or line.lstrip()[0] == "#"):
+            continue
+        if(":" not in line):
+            sys.exit("    Error: Missing Scenario Name on Line " + str(ln) + " in file '" + scenFile + "'\n")
+        name, changes = line.split(":", 1)
+        delta = [x.split() for x in changes.split(";") if x.strip()]
+        for x in delta:
+            if(x[0] not in sizes or len(x) != sizes[x[0]]):
+                sys.exit("    Error: Invalid Change '" + " ".join(x) + "' on Line " + str(ln) + " in file '" + scenFile + "'\n")
+        scenarios.append([name.strip(), delta])
+    return scenarios
+
+#the base graph shared by the worker processes of runScenarios
+#   set by setScenarioBase in each worker
+scenarioBase = {}
+
+#stores the base graph in a worker process, so it is sent to each worker once
+#   instead of once per scenario
+def setScenarioBase(base):
+    scenarioBase.clear()
+    scenarioBase.update(base)
+
+#scores one scenario against the base graph in scenarioBase
+#   scenario is a [name, list of changes] pair from readScenarios
+#   base is the base graph to use instead of scenarioBase (the same dictionary
+#       that runScenarios builds)
+#   returns [name, mean, max, number of residential areas whose distances changed,
+#       number of residential areas that can not reach any grocery store]
+#       where mean and max are taken over the average distance of every residential area
+def scoreScenario(scenario, base = None):
+    if(base is None):
+        base = scenarioBase
+    src, dst, wt = base["src"], base["dst"], base["wt"]
+    cols, table = base["cols"], base["table"]
+    avg = base["avg"]
+    changed = np.zeros(len(base["rows"]), dtype=bool)
+    for delta in scenario[1]:
+        src, dst, wt, cols, table, path, step = applyDelta(delta,base["N"],src,dst,wt,base["rows"],cols,table)
+        changed |= step
+    
+    #the number of stores to check can not be more than the stores left in the scenario
+    num = min(base["num"], len(cols))
+    if(num != base["num"]):
+        avg = nearestAvg(table,num) if num > 0 else np.full(len(table), np.nan)
+    elif(num > 0):
+        avg = updateAvg(avg,table,changed,num)
+    mean, most = avgSummary(avg)
+    return [scenario[0], mean, most, int(changed.sum()), int(np.isnan(avg).sum())]
+
+#the mean and largest average distance of the residential areas
+#   avg is an array of averages from nearestAvg
+#   areas that can not reach any grocery store (nan) are left out
+#returns mean, max (both nan if no area can reach a store)
+def avgSummary(avg):
+    found = avg[~np.isnan(avg)]
+    if(len(found) == 0):
+        return np.nan, np.nan
+    return float(found.mean()), float(found.max())
+
+#scores many scenarios (such as possible store locations) against one base graph
+#   inFile is the base graph (a text or compiled input file)
+#   scenFile is the file of scenarios (see readScenarios)
+#   outFile is the CSV file to write the results to
+#   num is the number of nearest grocery stores to average over
+#   workers is the number of processes to use (by default, one per core)
+#the base distances are computed once, then each scenario only updates them (see applyDelta)
+#the results hold the mean and max average distance for each scenario, and how much
+#   each changed from the base graph (a negative change means the scenario improves access)
+#   the mean and max leave out residential areas that can not reach any grocery store.
+#   The number of these is given in the last column
+#returns the rows written to outFile
+def runScenarios(inFile, scenFile, outFile, num, workers = None):
+    scenarios = readScenarios(scenFile)
+    G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+    table = baseTable(G,R,N,src,dst,wt,adj,stored)
+    num = min(num, len(G))
+    checkNum(num, len(G))
+    avg = nearestAvg(table,num)
+    base = {"N": N, "src": src, "dst": dst, "wt": wt, "rows": list(range(len(G),len(G)+len(R))),
+            "cols": list(range(len(G))), "table": table, "avg": avg, "num": num}
+    
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=setScenarioBase, initargs=(base,)) as pool:
+        scores = list(pool.map(scoreScenario, scenarios, chunksize=max(1, len(scenarios) // (4 * (workers or os.cpu_count() or 1)))))
+    
+    results = scenarioResults(avg, scores)
+    with open(outFile, "w", newline="") as file:
+        csv.writer(file).writerows(results)
+    return results
+
+#builds the rows of results written by runScenarios
+#   avg is the average distance of each residential area in the base graph
+#   scores is the list of results from scoreScenario
+#returns the rows, starting with the column names and the base graph
+def scenarioResults(avg, scores):
+    baseMean, baseMax = avgSummary(avg)
+    results = [["scenario","mean","max","mean change","max change","areas changed","unreachable areas"],
+               ["base", round(baseMean, 6), round(baseMax, 6), 0.0, 0.0, 0, int(np.isnan(avg).sum())]]
+    for x in scores:
+        results.append([x[0], round(x[1], 6), round(x[2], 6), round(x[1] - baseMean, 6), round(x[2] - baseMax, 6), x[3], x[4]])
+    return results
+
+#the engines that sensitivity can use
+#   'numpy'   - batches of graphs are solved at once with pathGraphBatch
+#   'nearest' - dijkstra is run from each residential area until num stores are found
+#       (see nearestTable). Much faster than 'numpy' on large graphs
+SENSITIVITY_ENGINES = ['numpy', 'nearest']
+
+#the most values the 'numpy' engine of sensitivity holds in one batch of matrices
+#   (2**17 float64 values is 1 MB). Batches that do not fit in the processor cache are
+#   slower than solving the graphs one at a time, so only small graphs are batched
+SENSITIVITY_BATCH = 2**17
+
+#reads a file of road classes for sensitivity
+#   each line holds the two nodes of an edge and the name of its class, e.g.
+#       R001 R002 highway
+#   blank lines and lines starting with # are skipped. Edges that are not listed
+#       have no class
+#   N, src, dst are the nodes and edges (see loadFile)
+#returns an array holding the class number of each edge (-1 for no class),
+#   and the list of class names
+def readClasses(classFile, N, src, dst):
+    if (not os.path.exists(classFile)):
+        sys.exit("    Error: Invalid Class File Name: '" + classFile + "' could not be found.")
+    index = {}
+    for x in range(len(N)):
+        index[N[x]] = x
+    #the edges joining each pair of nodes (there may be more than one)
+    pairs = {}
+    for x, (a, b) in enumerate(zip(src.tolist(), dst.tolist())):
+        pairs.setdefault((min(a, b), max(a, b)), []).append(x)
+    classes = np.full(len(src), -1, dtype=np.int64)
+    names = []
+    with open(classFile, "r") as file:
+        ln = 0
+        for line in file:
+            ln += 1
+            part = line.split()
+            if(not part or part[0][0] == "#"):
+                continue
+            if(len(part) != 3):
+                sys.exit("    Error: Invalid Input Detected on Line " + str(ln) + " in file '" + classFile + "'\n")
+            if(part[0] not in index or part[1] not in index):
+                sys.exit("    Error: Unknown Node on Line " + str(ln) + " in file '" + classFile + "'\n")
+            a, b = index[part[0]], index[part[1]]
+            if((min(a, b), max(a, b)) not in pairs):
+                sys.exit("    Error: No Edge Joins " + part[0] + " and " + part[1] + " on Line " + str(ln) + " in file '" + classFile + "'\n")
+            if(part[2] not in names):
+                names.append(part[2])
+            classes[pairs[(min(a, b), max(a, b))]] = names.index(part[2])
+    return classes, names
+
+#draws the factors that one run of sensitivity multiplies the edge lengths by
+#   seed and run pick the random numbers, so each run always gets the same factors,
+#       however the runs are split between processes
+#   noise is the spread of the factors: each factor is lognormal, so it is always
+#       positive, with a mean of 1 and a standard deviation of about noise (for small noise)
+#   classes is the class number of each edge (see readClasses). All the edges in
+#       a class share one factor, and edges with no class (-1) get their own
+#returns an array holding the factor for each edge
+def weightFactors(seed, run, noise, classes):
+    rng = np.random.default_rng([seed, run])
+    factor = rng.lognormal(-noise**2 / 2, noise, len(classes))
+    if(len(classes) and classes.max() >= 0):
+        shared = rng.lognormal(-noise**2 / 2, noise, classes.max() + 1)
+        factor = np.where(classes >= 0, shared[np.maximum(classes, 0)], factor)
+    return factor
+
+#the graph shared by the worker processes of sensitivity
+#   set by setSensitivityBase in each worker
+sensitivityBase = {}
+
+#stores the graph in a worker process, so it is sent to each worker once
+#   instead of once per batch of runs
+def setSensitivityBase(base):
+    sensitivityBase.clear()
+    sensitivityBase.update(base)
+
+#finds the average distance of every residential area with different edge lengths
+#   factors is a (runs by edges) array. Each row is multiplied into the edge lengths
+#       of the graph in base (by default, sensitivityBase) for one run
+#   base is the dictionary built by sensitivity
+#only the edge lengths change between runs: the 'numpy' engine fills a stack of
+#   matrices at the same positions and solves them all with pathGraphBatch, and the
+#   'nearest' engine reuses one adjacency list, swapping in the new lengths
+#returns a (runs by residential areas) array of averages (nan if an area can not reach any store)
+def perturbedAvg(factors, base = None):
+    if(base is None):
+        base = sensitivityBase
+    gNum, rNum, num = base["gNum"], base["rNum"], base["num"]
+    weights = base["wt"][None,:] * factors
+    if(base["engine"] == 'numpy'):
+        graphs = np.full((len(weights), base["n"], base["n"]), np.nan)
+        #the same as prepGraphArrays, for every run at once
+        runs = np.arange(len(weights))[:,None]
+        np.fmin.at(graphs, (runs,base["src"][None,:],base["dst"][None,:]), weights)
+        np.fmin.at(graphs, (runs,base["dst"][None,:],base["src"][None,:]), weights)
+        pathGraphBatch(graphs)
+        return nearestAvg(graphs[:,gNum:gNum+rNum,0:gNum].reshape(-1, gNum),num).reshape(len(weights), rNum)
+    avg = np.empty((len(weights), rNum))
+    indptr, indices, edge = base["adj"]
+    for x in range(len(weights)):
+        table = nearestTable((indptr, indices, weights[x][edge]),range(gNum,gNum+rNum),range(gNum),num)
+        avg[x] = nearestAvg(table,num)
+    return avg
+
+#runs a batch of runs of sensitivity in a worker process
+#   first is the number of the first run, and count is the number of runs
+#returns the (runs by residential areas) array from perturbedAvg
+def sensitivityRuns(first, count):
+    base = sensitivityBase
+    return perturbedAvg(np.array([weightFactors(base["seed"], x, base["noise"], base["classes"])
+                                  for x in range(first, first + count)]))
+
+#gives the rank of each residential area, the same as the order of rankOrder
+#   avg is the average distance of each area
+#   close is the same as in rankOrder (true ranks the longest average first)
+#returns an array holding the rank of each area, from 1 (nan for areas that can not reach any store)
+def avgRanks(avg, close = True):
+    idx = np.arange(len(avg))
+    #nan is sorted after every number, so unreachable areas come last
+    order = np.lexsort((-idx, -avg)) if close else np.lexsort((idx, avg))
+    rank = np.empty(len(avg))
+    rank[order] = np.arange(1, len(avg) + 1)
+    rank[np.isnan(avg)] = np.nan
+    return rank
+
+#finds how much the ranking of the residential areas can change when the edge lengths
+#   are not known exactly (Monte-Carlo sensitivity analysis)
+#takes in:
+#   inFile - the input file (text or compiled)
+#   outFile - the CSV file to write the results to
+#   num - the number of nearest grocery stores to average over
+#   runs - the number of times to solve the graph with different edge lengths
+#   noise - how much each edge length may change (see weightFactors). 0.1 is about 10%
+#   classFile - an optional file of road classes (see readClasses). The edges in a class
+#       all change by the same factor in each run, as they would with traffic
+#   engine - one of SENSITIVITY_ENGINES
+#   top - the number of most isolated areas to count how often each area is among
+#   level - the share of runs that the range of each value covers (0.9 gives the 5th
+#       to 95th percentiles)
+#   workers - the number of processes to use (by default, one per core)
+#   seed - the random seed, so the same settings always give the same results
+#the full graph is used, as simplifying it (see simplifyGraph) would merge edges whose
+#   lengths change by different amounts
+#the runs are split into batches, which are solved in parallel by a pool of processes.
+#   The graph is sent to each process once, and only the edge lengths change between runs
+#the results hold one row for each residential area, in ranked order (longest first):
+#   area, name - the area's code and name
+#   average, rank - its average distance and rank with the edge lengths in the file
+#   mean, std, low, median, high - the mean, standard deviation, and percentiles of its
+#       average distance over the runs
+#   mean rank, best rank, median rank, worst rank - the same for its rank
+#       (best and worst are the percentiles, so rank 1 is the most isolated)
+#   top share - the share of runs in which it was among the top most isolated areas
+#   areas that can not reach any grocery store are listed at the end, with empty values
+#returns the rows written to outFile
+def sensitivity(inFile, outFile, num, runs = 1000, noise = 0.1, classFile = None, engine = 'numpy',
+                top = 10, level = 0.9, workers = None, seed = 1):
+    if(engine not in SENSITIVITY_ENGINES):
+        sys.exit("    Error: Unknown Engine '" + str(engine) + "'. Use one of: " + ", ".join(SENSITIVITY_ENGINES) + "\n")
+    if(runs <= 0 or noise < 0 or not 0 < level < 1):
+        sys.exit("    Error: The number of runs must be above 0, the noise at least 0 and the level between 0 and 1\n")
+    G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+    num = min(num, len(G))
+    checkNum(num, len(G))
+    classes = readClasses(classFile, N, src, dst)[0] if classFile is not None else np.full(len(src), -1, dtype=np.int64)
+    base = {"n": len(N), "gNum": len(G), "rNum": len(R), "num": num, "src": src, "dst": dst,
+            "wt": np.asarray(wt, dtype=np.float64), "engine": engine, "classes": classes, "noise": noise, "seed": seed}
+    if(engine == 'nearest'):
+        #the adjacency list holds the number of each edge in place of its length,
+        #   so each run only has to look up its own lengths
+        base["adj"] = prepAdjArrays(len(N),src,dst,np.arange(len(src)),np.int64)
+    
+    workers = workers or os.cpu_count() or 1
+    #enough batches to keep every process busy, with each batch small enough to fit in memory
+    size = max(1, min(-(-runs // workers), SENSITIVITY_BATCH // max(1, len(N)**2) if engine == 'numpy' else runs))
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=setSensitivityBase, initargs=(base,)) as pool:
+        jobs = [pool.submit(sensitivityRuns, x, min(size, runs - x)) for x in range(0, runs, size)]
+        avg = np.vstack([x.result() for x in jobs])
+    
+    baseAvg = perturbedAvg(np.ones((1, len(src))), base)[0]
+    baseRank = avgRanks(baseAvg)
+    ranks = np.array([avgRanks(x) for x in avg])
+    #an area that can reach a store in one run can reach one in every run
+    found = ~np.isnan(baseAvg)
+    low, high = (1 - level) / 2 * 100, (1 + level) / 2 * 100
+    stats = np.full((len(R), 10), np.nan)
+    if(found.any()):
+        part = avg[:,found]
+        rank = ranks[:,found]
+        stats[found] = np.column_stack((part.mean(axis=0), part.std(axis=0), np.percentile(part, [low, 50, high], axis=0).T,
+                                        rank.mean(axis=0), np.percentile(rank, [low, 50, high], axis=0, method='nearest').T,
+                                        (rank <= top).mean(axis=0)))
+    
+    results = [["area","name","average","rank","mean","std","low","median","high",
+                "mean rank","best rank","median rank","worst rank","top share"]]
+    for x in np.lexsort((np.arange(len(R)), np.nan_to_num(baseRank, nan=np.inf))).tolist():
+        if(not found[x]):
+            results.append([R[x][0], " ".join(R[x][1:])] + [""] * 12)
+            continue
+        results.append([R[x][0], " ".join(R[x][1:]), round(baseAvg[x], 6), int(baseRank[x])] +
+                       [round(y, 6) for y in stats[x][0:6]] + [int(y) for y in stats[x][6:9]] + [round(stats[x][9], 6)])
+    with open(outFile, "w", newline="") as file:
+        csv.writer(file).writerows(results)
+    return results
+
+#picks the best places to open new grocery stores
+#takes in:
+#   N, src, dst, wt - the nodes and edges (see loadFile)
+#   rows - the node indices of the residential areas
+#   table - the residential area by grocery store distance matrix
+#   num - the number of nearest grocery stores to average over
+#   count - the number of new stores to pick
+#   candidates - the node indices where a store may be opened
+#   objective - 'total' to make the average distance as small as possible over all
+#       residential areas, or 'worst' to make the largest average distance as small as possible
+#each residential area keeps its num nearest distances so far, so scoring a candidate
+#   only compares its distance to each area with that area's numth nearest store
+#for 'total', candidates are kept in a priority queue by how much they would improve
+#   the score. Adding a store can only make the other candidates less useful, so a
+#   candidate is only re-scored when it reaches the front of the queue (lazy greedy)
+#for 'worst' that is not true, so every candidate is re-scored each round
+#residential areas that can reach fewer than num stores are charged INF for each
+#   missing store while scoring, so reaching an area with no store counts as a large improvement
+#returns a list of [node index, mean, max] for each store picked, in the order picked,
+#   where mean and max are taken over the average distance of every residential area
+#   once that store (and the ones before it) are open (see nearestAvg and avgSummary,
+#   so areas that still reach no store are left out, and missing stores are not charged)
+def pickStores(N,src,dst,wt,rows,table,num,count,candidates,objective = 'total'):
+    if(objective not in ('total', 'worst')):
+        sys.exit("    Error: Unknown Objective '" + str(objective) + "'. Use 'total' or 'worst'.\n")
+    rows = list(rows)
+    candidates = list(candidates)
+    
+    #the num nearest stores to each residential area
+    best = np.array(table,dtype=np.float64)
+    best[np.isnan(best)] = INF
+    best = np.hstack((best, np.full((len(rows), max(0, num - best.shape[1])), float(INF))))
+    if(num < best.shape[1]):
+        best = np.partition(best,num-1,axis=1)[:,0:num]
+    best.sort(axis=1)
+    
+    #the distance from each candidate to each residential area
+    adj = prepAdjArrays(len(N),src,dst,wt)
+    adjList = (adj[0].tolist(), adj[1].tolist(), adj[2].tolist())
+    dist = np.empty((len(candidates), len(rows)))
+    for x in range(len(candidates)):
+        found = dijkstra(adjList, candidates[x], rows)
+        dist[x] = [found[y] for y in rows]
+    dist = np.minimum(dist, INF)
+    
+    picks = []
+    picked = np.zeros(len(candidates), dtype=bool)
+    #the priority queue holds (-gain, candidate, the round its gain was found in)
+    heap = [(-np.maximum(best[:,-1] - dist[x], 0).sum(), x, 0) for x in range(len(candidates))]
+    heapq.heapify(heap)
+    for step in range(min(count, len(candidates))):
+        if(objective == 'total'):
+            while(True):
+                gain, x, found = heapq.heappop(heap)
+                if(found == step):
+                    break
+                heapq.heappush(heap, (-np.maximum(best[:,-1] - dist[x], 0).sum(), x, step))
+        else:
+            #the largest average each candidate would leave
+            worst = ((best.sum(axis=1) - best[:,-1])[None,:] + np.minimum(best[:,-1][None,:], dist)).max(axis=1)
+            worst[picked] = np.inf
+            x = int(np.argmin(worst))
         
-        #takes the length of each string in R, ignores the R### code
-        for y in range(1,len(R[order[x][1]-gNum])):
-            printStr += str(R[order[x][1]-gNum][y])
-            printStr += " "
-        printStr = printStr.ljust(30) 
-        #adds the average distance
-        numStr += str("{:.4f}".format(order[x][0]/1000))
-        numStr += " km"
-        printStr += numStr.rjust(5)
-        print(printStr)       
+        #opens the store, replacing the numth nearest store of each area it is closer to
+        picked[x] = True
+        closer = dist[x] < best[:,-1]
+        best[closer,-1] = dist[x][closer]
+        best[closer] = np.sort(best[closer], axis=1)
+        #the INF charge is only for scoring, so the averages reported skip missing stores
+        picks.append([candidates[x]] + list(avgSummary(nearestAvg(best,num))))
+    return picks
+
+#picks the best places for new grocery stores in an input file (see pickStores)
+#   inFile is the input file (text or compiled)
+#   count, num and objective are the same as in pickStores
+#   candidates is a list of node codes where a store may be opened
+#       (by default, every intersection)
+#returns the node codes of the stores picked, and the list from pickStores
+def siteStores(inFile, count, num, candidates = None, objective = 'total'):
+    G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+    table = baseTable(G,R,N,src,dst,wt,adj,stored)
+    num = min(num, len(G))
+    checkNum(num, len(G))
+    if(candidates is None):
+        cand = list(range(len(G)+len(R), len(N)))
+    else:
+        index = {}
+        for x in range(len(N)):
+            index[N[x]] = x
+        for x in candidates:
+            if(x not in index):
+                sys.exit("    Error: Unknown Candidate Node '" + str(x) + "'\n")
+        #nodes that are already stores are skipped
+        cand = [index[x] for x in candidates if index[x] >= len(G)]
+    picks = pickStores(N,src,dst,wt,range(len(G),len(G)+len(R)),table,num,count,cand,objective)
+    return [N[x[0]] for x in picks], picks
+
+#describes the routes from some nodes to their nearest grocery stores (see nearestRoutes)
+#   inFile is the input file (text or compiled). The full graph is used, so every
+#       intersection on the way is shown
+#   codes is a list of node codes to start from (usually residential areas)
+#   num is the number of nearest grocery stores to show for each
+#returns the text, e.g. for sample.txt and R002:
+#   RA Two (R002)
+#       GS Two (G002)              0.0450 km    R002 > R003 > I002 > G002
+def showRoutes(inFile, codes, num):
+    G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+    index = {}
+    for x in range(len(N)):
+        index[N[x]] = x
+    names = G + R + I
+    lines = []
+    for code in codes:
+        if(code not in index):
+            sys.exit("    Error: Unknown Node '" + str(code) + "'\n")
+        node = index[code]
+        lines.append(" ".join(names[node][1:]) + " (" + code + ")")
+        found = nearestRoutes(adj, node, range(len(G)), num)
+        if(not found):
+            lines.append("    No Path to Any Grocery Store")
+        for store, dist, route in found:
+            lines.append("    " + (" ".join(names[store][1:]) + " (" + N[store] + ")").ljust(27)
+                         + "{:.4f} km".format(dist/1000).ljust(13) + " > ".join(N[x] for x in route))
+    return "\n".join(lines)
 
 def main():
     run = True
@@ -299,9 +2458,15 @@ def main():
     G = [] #holds grocery stores
     R = [] #holds residential areas
     I = [] #holds intersections
-    E = [] #holds edges
-    opt = [False,True,INF,'5']
-    optInput = '5'
+    N = [] #holds the codes of all the nodes
+    #holds the edges, as the index in N of the two nodes joined and the length
+    src = dst = wt = np.empty(0)
+    opt = [False,True,INF,'5','numpy',True]
+    optInput = '7'
+    #the sorted distances of the loaded file (see distIndex), built the first time the
+    #   rankings are shown, and the number of stores it was built for
+    index = None
+    indexNum = 0
     oFile = "output.txt"
     
     while(run):
@@ -310,42 +2475,33 @@ def main():
             G.clear()
             R.clear()
             I.clear()
-            E.clear()
             badInput = False
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clearScreen()
             
             #reads the input file in
             inFile = input("\n    Please Enter the Name of Your Datafile:\n\n\n\n")
-            readFile(inFile,G,R,I,E)
-        
-            #splits each item in each list on spaces
-            #i.e. ["R001 RA One"] becomes ["R001","RA","One"] 
-            for x in range(0,len(G)):
-                G[x] = G[x].split()
-            for x in range(0,len(R)):
-                R[x] = R[x].split()
-            for x in range(0,len(I)):
-                I[x] = I[x].split()
-            for x in range(0,len(E)):
-                E[x] = E[x].split()
-                
-            #adds a list that holds N, which contains all the nodes
-            N=[]
-            N.clear()
-            loadNodes(G,R,I,N)
-    
-            #gets the adjacency matrix
-            graph=prepGraph(N,E) 
-    
-            #gets the Floyd-Warshall matrix from the adjacency matrix
-            path = pathGraph(graph)
+            #the nodes come back already split on spaces
+            #   i.e. ["R001 RA One"] becomes ["R001","RA","One"]
+            #   and N holds all the nodes
+            #the edges are kept as arrays of node indices instead of a list of strings
+            #compiled (binary) files already hold the adjacency list,
+            #   and may hold the distance table as well
+            G, R, I, N, src, dst, wt, adj, stored = readGraph(inFile)
+            #removes the intersections that do not change any distances
+            removed = None
+            if(opt[5]):
+                I, N, src, dst, wt, adj, removed = simplifyGraph(G,R,I,N,src,dst,wt,adj)
+            path, table = solveGraph(G,R,N,src,dst,wt,adj,stored,opt[4])
+            index = None
             
             print("\n\n\n    File Loaded Successfully")
+            if(removed is not None):
+                print("\n    Simplified Graph: Removed " + str(removed[0]) + " Nodes and " + str(removed[1]) + " Edges")
             print("\n\n\n\n\n\n\n")
             input("    Press Enter to Continue...")
                 
         elif(userIn == '2'):
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clearScreen()
             if(inFile == ""):
                 print("\n    Error: No Input File Specified\n\n\n\n")
                 input("    Press Enter to Continue...")
@@ -358,10 +2514,15 @@ def main():
             #   present in the data set, sets it to all
             if(num > len(G)):
                 num = len(G)
-            order = []
-            order.clear()
+            checkNum(num,len(G))
+            #the distances are only sorted once for each file, so changing the settings
+            #   and showing the rankings again does not sort them again. The nearest
+            #   engine only finds num stores, so it is searched again if num goes up
+            if(index is None or (table is None and indexNum < num)):
+                index = distIndex(rankTable(G,R,N,src,dst,wt,adj,table,num))
+                indexNum = num
             #print(len(G),len(R),num,opt[1])
-            order = getIsol(path,len(G),len(R),num,opt[1])
+            order = rankOrder(indexAvg(index,num),len(G),opt[1],int(opt[2]))
             
             #prints the output
             if(not opt[0]):
@@ -372,23 +2533,22 @@ def main():
             else:
                 #creates file if it doesn't exist:
                 with open(oFile,'w') as file:
-                    with contextlib.redirect_stdout(file):
-                        getTop(R,order,len(G),int(opt[2]))
+                    file.write(formatTop(R,order,len(G),int(opt[2])) + "\n")
                 print("\n    Output Sent to file: " + oFile + "\n\n\n")
                 print("\n\n\n")
                 input("    Press Enter to Continue...")
         
         elif(userIn == '3'):
-            optInput = '6'
+            optInput = '8'
             bad = False
-            while(optInput != '5'):
-                os.system('cls' if os.name == 'nt' else 'clear')
+            while(optInput != '7'):
+                clearScreen()
                 optInput = optionsMenu(opt,oFile,bad)
                 if(optInput == '1'):
                     bad = False
                     if(opt[0] == False):
                         opt[0] = True
-                        os.system('cls' if os.name == 'nt' else 'clear')
+                        clearScreen()
                         oFile = input("\n    Please enter a name for the output file:\n\n\n")
                     else:
                         opt[0] = False
@@ -405,7 +2565,7 @@ def main():
                     while(setOptNum):
                         if(not setOpt.isnumeric()):
                             print("Error: You Must Input a Number")
-                        os.system('cls' if os.name == 'nt' else 'clear')
+                        clearScreen()
                         setOpt = input("\n    Input a numeric value, or 'all':\n\n\n")
                         if(not setOpt.isnumeric() or setOpt.lower() != 'all'):
                             setOptNum = False
@@ -419,7 +2579,7 @@ def main():
                     while(setOptNum):
                         if(not opt[3].isnumeric()):
                             print("Error: You Must Input a Number")
-                        os.system('cls' if os.name == 'nt' else 'clear')
+                        clearScreen()
                         setOpt = input("\n    Input a numeric value:\n\n\n")
                         if(not setOpt.isnumeric()):
                             setOptNum = True
@@ -428,19 +2588,26 @@ def main():
                             setOptNum = False
                 elif(optInput == '5'):
                     bad = False
+                    #moves on to the next engine in the list
+                    opt[4] = ENGINES[(ENGINES.index(opt[4])+1) % len(ENGINES)]
+                elif(optInput == '6'):
+                    bad = False
+                    opt[5] = not opt[5]
+                elif(optInput == '7'):
+                    bad = False
                 else:
                     bad = True
         
         elif(userIn == '4'):
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clearScreen()
             run = False
         
         elif(userIn == '13'):
             debugNow = True
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clearScreen()
             while(debugNow):
                 getNum = devMenu()
-                os.system('cls' if os.name == 'nt' else 'clear')
+                clearScreen()
                 if(getNum == '0'):
                     print("\n\n\n   G = \n")
                     print(G)
@@ -455,16 +2622,22 @@ def main():
                     input("\n\n    Press Enter to Continue...")
                 elif(getNum == '3'):
                     print("\n\n\n   E = \n")
-                    print(E)
+                    print([[N[x],N[y],z] for x,y,z in zip(src.tolist(),dst.tolist(),wt.tolist())])
                     input("\n\n    Press Enter to Continue...")
                 elif(getNum == '4'):
                     print("\n\n\n   N = \n")
                     print(N)
                 elif(getNum == '5'):
+                    #the adjacency matrix is only built when it is needed
                     print("\n\n\n   graph = \n")
-                    print(graph)
+                    print(prepGraphArrays(len(N),src,dst,wt))
                     input("\n    Press Enter to Continue...")
                 elif(getNum == '6'):
+                    #solveGraph does not build the full path matrix for every graph (the engine
+                    #   may only find the distance table, or each component may be solved on
+                    #   its own), so it is built here when it is needed
+                    if(path is None):
+                        path = fullPath(N,src,dst,wt,opt[4] if opt[4] in ('numpy','blocked','loop') else 'numpy',np.dtype(DTYPE))
                     print("\n\n\n   path = \n")
                     print(path)
                     input("\n\n    Press Enter to Continue...")
@@ -474,6 +2647,14 @@ def main():
         else:
             badInput = True
     
+#clears the terminal
+#   uses an escape code where it can, instead of starting a new 'clear' process every time
+def clearScreen():
+    if(os.name == 'nt'):
+        os.system('cls')
+    else:
+        print("\033[H\033[2J", end="", flush=True)
+
 #prints the user menu
 #   badInput is a boolean triggered if the user sends bad input
 #   inFile is the current input file
@@ -481,7 +2662,7 @@ def main():
 def printMenu(badInput = False, inFile = ""):
     if inFile == "":
         inFile = "No File Loaded"
-    os.system('cls' if os.name == 'nt' else 'clear')
+    clearScreen()
     print("""   
               _____ _____ ______  _____ _____ 
         /\   / ____/ ____|  ____|/ ____/ ____|
@@ -524,6 +2705,9 @@ def printMenu(badInput = False, inFile = ""):
 #       opt[0] = false
 #       opt[1] = false
 #       opt[2] = INF (All)
+#       opt[3] = '5'
+#       opt[4] = 'numpy' (the shortest path engine)
+#       opt[5] = True (simplify the graph before solving)
 #   oFile is the output file specified (defaults to output.txt)
 #   bad is True if the user input does not correspond to one of the options
 def optionsMenu(opt, oFile = "output.txt", bad = False):
@@ -550,7 +2734,14 @@ def optionsMenu(opt, oFile = "output.txt", bad = False):
         sys.exit("    An Error Occured. Value of Opt[2] not set properly. See function optionsMenu.\n")
     print("\n\n    4) Nearest Number of Grocery Stores to Check\n")
     print("      " + str(opt[3]))
-    print("\n\n    5) Return to Menu\n\n\n")
+    print("\n\n    5) Shortest Path Engine (used when the next file is read)\n")
+    print("      " + str(opt[4]))
+    print("\n\n    6) Simplify Graph (used when the next file is read)\n")
+    if(opt[5]):
+        print("      [X] On              [ ] Off ")
+    else:
+        print("      [ ] On              [X] Off ")
+    print("\n\n    7) Return to Menu\n\n\n")
     
     if(bad):
         print("    Error: Invalid Input Detected. Enter a Number Corresponding to One of the Options Above\n\n")
@@ -589,6 +2780,136 @@ def devMenu():
     
     return input()
 
+#runs the program from the command line without the menus
+#   args is the list of command line arguments (not including the program name)
+#commands:
+#   compile <input file> <output file> [--table]
+#       compiles a text input file into a binary graph file, which can be read
+#       from the main menu like any other input file
+#   scenarios <input file> <scenario file> [-o output.csv] [--num 5] [--jobs N]
+#       scores each scenario in the scenario file against the input file (see runScenarios)
+#   site <input file> [--count 1] [--num 5] [--objective total] [--candidates I001 I002 ...]
+#       picks the best places for new grocery stores (see pickStores)
+#   run <input files, folders or patterns> [-o output] [--num 5] [--top N] [--order longest]
+#           [--engine numpy] [--jobs N] [--no-simplify] [--profile] [--cprofile STAGE]
+#           [--export csv] [--export-table] [--export-nearest]
+#       writes the ranked residential areas for each input file, the same as
+#       the Get Output menu option (see runFiles)
+#   route <input file> <node codes> [--num 5]
+#       prints the route from each node (usually a residential area) to its nearest
+#       grocery stores (see showRoutes)
+#   sensitivity <input file> [-o sensitivity.csv] [--runs 1000] [--noise 0.1] [--classes FILE]
+#           [--num 5] [--top 10] [--level 0.9] [--engine numpy] [--jobs N] [--seed 1]
+#       solves the input file many times with randomly changed edge lengths, and writes
+#       the range of each residential area's average distance and rank (see sensitivity)
+def commandLine(args):
+    parser = argparse.ArgumentParser(prog="accessGraph.py", description="Run with no arguments to use the menus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    compileCmd = commands.add_parser("compile", help="compile an input file into a binary graph file")
+    compileCmd.add_argument("inFile", help="the text input file")
+    compileCmd.add_argument("outFile", help="the binary file to write")
+    compileCmd.add_argument("--table", action="store_true", help="also compute and store the residential area to grocery store distances")
+    
+    scenCmd = commands.add_parser("scenarios", help="score a file of scenarios (such as new store locations) against a graph")
+    scenCmd.add_argument("inFile", help="the base input file (text or compiled)")
+    scenCmd.add_argument("scenFile", help="the scenario file")
+    scenCmd.add_argument("-o", "--output", default="scenarios.csv", help="the CSV file to write (default: scenarios.csv)")
+    scenCmd.add_argument("--num", type=int, default=5, help="the number of nearest grocery stores to check (default: 5)")
+    scenCmd.add_argument("--jobs", type=int, default=None, help="the number of processes to use (default: one per core)")
+    
+    siteCmd = commands.add_parser("site", help="pick the best places for new grocery stores")
+    siteCmd.add_argument("inFile", help="the input file (text or compiled)")
+    siteCmd.add_argument("--count", type=int, default=1, help="the number of new stores to pick (default: 1)")
+    siteCmd.add_argument("--num", type=int, default=5, help="the number of nearest grocery stores to check (default: 5)")
+    siteCmd.add_argument("--objective", choices=["total", "worst"], default="total",
+                         help="make the mean (total) or the largest (worst) average distance as small as possible")
+    siteCmd.add_argument("--candidates", nargs="+", default=None, help="the nodes a store may be opened at (default: every intersection)")
+    
+    runCmd = commands.add_parser("run", help="rank the residential areas in one or more input files")
+    runCmd.add_argument("inFiles", nargs="+", help="input files, folders or patterns such as 'graphs/*.txt'")
+    runCmd.add_argument("-o", "--output", default=None,
+                        help="the output file (for one input) or folder (by default, results go next to each input)")
+    runCmd.add_argument("--num", type=int, default=5, help="the number of nearest grocery stores to check (default: 5)")
+    runCmd.add_argument("--top", type=int, default=INF, help="the number of residential areas to output (default: all)")
+    runCmd.add_argument("--order", choices=["longest", "shortest"], default="longest", help="which residential areas to list first (default: longest)")
+    runCmd.add_argument("--engine", choices=ENGINES, default="numpy", help="the shortest path engine (default: numpy)")
+    runCmd.add_argument("--jobs", type=int, default=None, help="the number of processes to use (default: one per core)")
+    runCmd.add_argument("--dtype", choices=["float32", "float64"], default=None,
+                        help="the type used to store distances. float32 uses half the memory (default: float64)")
+    runCmd.add_argument("--no-simplify", action="store_true",
+                        help="solve the full graph, without first removing dead end and chain intersections")
+    runCmd.add_argument("--profile", action="store_true",
+                        help="write the time and memory used by each stage to '<output name>.profile.json'")
+    runCmd.add_argument("--cprofile", default=None, metavar="STAGE",
+                        choices=["readGraph", "simplifyGraph", "findComponents", "componentTable", "distTable", "hierarchyTable",
+                                 "prepGraph", "pathGraph", "getIsol", "getTop", "export"],
+                        help="also run one stage under cProfile, writing '<output name>.profile.STAGE.prof' (turns on --profile)")
+    runCmd.add_argument("--export", choices=EXPORTS, default=None,
+                        help="also write the whole ranking to files starting with the output name, for use in other programs")
+    runCmd.add_argument("--export-table", action="store_true",
+                        help="with --export, also write the distance from every residential area to every grocery store")
+    runCmd.add_argument("--export-nearest", action="store_true",
+                        help="with --export, also write the --num nearest grocery stores to each residential area")
+    
+    routeCmd = commands.add_parser("route", help="show the routes from residential areas to their nearest grocery stores")
+    routeCmd.add_argument("inFile", help="the input file (text or compiled)")
+    routeCmd.add_argument("codes", nargs="+", help="the codes of the nodes to start from, such as R001")
+    routeCmd.add_argument("--num", type=int, default=5, help="the number of nearest grocery stores to show (default: 5)")
+    
+    sensCmd = commands.add_parser("sensitivity", help="find how much the rankings change when the edge lengths are uncertain")
+    sensCmd.add_argument("inFile", help="the input file (text or compiled)")
+    sensCmd.add_argument("-o", "--output", default="sensitivity.csv", help="the CSV file to write (default: sensitivity.csv)")
+    sensCmd.add_argument("--runs", type=int, default=1000, help="the number of times to solve the graph (default: 1000)")
+    sensCmd.add_argument("--noise", type=float, default=0.1,
+                         help="how much each edge length may change, e.g. 0.1 for about 10%% (default: 0.1)")
+    sensCmd.add_argument("--classes", default=None,
+                         help="a file of road classes. The edges in a class all change together (default: each edge changes on its own)")
+    sensCmd.add_argument("--num", type=int, default=5, help="the number of nearest grocery stores to check (default: 5)")
+    sensCmd.add_argument("--top", type=int, default=10, help="count how often each area is among this many most isolated areas (default: 10)")
+    sensCmd.add_argument("--level", type=float, default=0.9, help="the share of runs each range covers (default: 0.9)")
+    sensCmd.add_argument("--engine", choices=SENSITIVITY_ENGINES, default="numpy",
+                         help="numpy solves batches of small graphs at once, nearest is faster on large graphs (default: numpy)")
+    sensCmd.add_argument("--jobs", type=int, default=None, help="the number of processes to use (default: one per core)")
+    sensCmd.add_argument("--seed", type=int, default=1)
+    
+    args = parser.parse_args(args)
+    if(args.command == "compile"):
+        compileFile(args.inFile, args.outFile, args.table)
+        print("    Compiled '" + args.inFile + "' to '" + args.outFile + "'")
+    elif(args.command == "scenarios"):
+        results = runScenarios(args.inFile, args.scenFile, args.output, args.num, args.jobs)
+        print("    Scored " + str(len(results)-2) + " scenarios. Results sent to file: " + args.output)
+    elif(args.command == "site"):
+        codes, picks = siteStores(args.inFile, args.count, args.num, args.candidates, args.objective)
+        print("Store Location       Mean Average Distance     Largest Average Distance")
+        for x in range(len(picks)):
+            print(codes[x].ljust(21) + ("{:.4f}".format(picks[x][1]/1000) + " km").ljust(26) + "{:.4f}".format(picks[x][2]/1000) + " km")
+    elif(args.command == "run"):
+        inFiles = findInputs(args.inFiles)
+        if(not inFiles):
+            sys.exit("    Error: No Input Files Found\n")
+        failed = 0
+        for inFile, outFile, error, removed in runFiles(inFiles, args.output, args.num, args.top, args.order == "longest",
+                                                        args.engine, args.jobs, args.dtype, not args.no_simplify,
+                                                        args.profile, args.cprofile, args.export, args.export_table, args.export_nearest):
+            if(error is None):
+                print("    " + inFile + " -> " + outFile + " (removed " + str(removed[0]) + " nodes and " + str(removed[1]) + " edges)")
+            else:
+                failed += 1
+                print("    " + inFile + ": " + error)
+        if(failed):
+            sys.exit("    " + str(failed) + " of " + str(len(inFiles)) + " input files could not be processed\n")
+    elif(args.command == "route"):
+        print(showRoutes(args.inFile, args.codes, args.num))
+    elif(args.command == "sensitivity"):
+        results = sensitivity(args.inFile, args.output, args.num, args.runs, args.noise, args.classes, args.engine,
+                              args.top, args.level, args.jobs, args.seed)
+        print("    Solved " + str(args.runs) + " runs. Results for " + str(len(results)-1) + " residential areas sent to file: " + args.output)
+
 #executes main function
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if(len(sys.argv) > 1):
+        commandLine(sys.argv[1:])
+    else:
+        main()
\ No newline at end of file
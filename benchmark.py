@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+__author__ = "Blake Harrison"
+__copyright__ = "Copyright 2021"
+__credits__ = [""]
+__license__ = "GPLv3"
+__version__ = "1.5.2"
+__maintainer__ = ""
+__email__ = "bharriso@highpoint.edu"
+__status__ = "Release"
+
+#times the shortest path engines in accessGraph.py against each other
+#
+#usage:
+#   python3 benchmark.py [--sizes 100 500 2000] [--loop-limit 100] [--seed 1]
+#                        [--tile 256] [--threads N]
+#
+#the original triple loop engine takes hours on large graphs, so it is only
+#   run on sizes up to --loop-limit. Larger sizes get an estimate scaled from
+#   the largest size it was run on (the engine is O(N^3))
+#the speedup column compares the loop and numpy engines
+#the hierarchy column gives the time to build the contraction hierarchy, then the time
+#   to find the distances with it (the hierarchy is saved, so later runs only take the second)
+#--tile and --threads set the tile size and thread count of the blocked engine
+#
+#with --pipeline, the whole program is timed instead (reading the file, simplifying,
+#   solving, ranking and writing the output) on files made by generate.py:
+#   python3 benchmark.py --pipeline [--type street] [--sizes 100 500 2000] [--engine numpy]
+#                        [--num 5] [--check-limit 60] [--seed 1]
+#   the time of each stage is printed for each size, followed by how fast each stage
+#   grows with the number of nodes (an exponent of 3 means 10 times the nodes takes
+#   1000 times as long)
+#   on sizes up to --check-limit, the rankings from every engine (with and without
+#   simplifying the graph) are checked against the original loop engine
+#   the input files in MALFORMED are then checked to be rejected with the right line number
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import accessGraph
+import generate
+
+#builds a random connected graph with n nodes
+#   returns the lists G, R, I, E in the same (split) form main() uses
+#   roughly 10% of the nodes are grocery stores and 40% are residential areas,
+#   the rest are intersections
+#   every node is joined to an earlier node so the graph is connected,
+#   then extra edges are added until the average degree is about degree
+#   no pair of nodes is joined by more than one edge
+def randomGraph(n, degree = 3, seed = 1):
+    rng = np.random.default_rng(seed)
+    gNum = max(1, n // 10)
+    rNum = max(1, (n * 2) // 5)
+    iNum = n - gNum - rNum
+    G = [["G" + str(x).zfill(4), "Store", str(x)] for x in range(gNum)]
+    R = [["R" + str(x).zfill(4), "Area", str(x)] for x in range(rNum)]
+    I = [["I" + str(x).zfill(4), "Intersection", str(x)] for x in range(iNum)]
+
+    N = []
+    accessGraph.loadNodes(G,R,I,N)
+    order = rng.permutation(n)
+    E = []
+    #pairs already joined, so no two edges connect the same nodes
+    used = set()
+    for x in range(1, n):
+        prev = order[rng.integers(0, x)]
+        used.add((min(order[x], prev), max(order[x], prev)))
+        E.append([N[order[x]], N[prev], str(int(rng.integers(10, 500)))])
+    while(len(E) < (n * degree) // 2):
+        a, b = rng.integers(0, n, size=2)
+        if(a != b and (min(a, b), max(a, b)) not in used):
+            used.add((min(a, b), max(a, b)))
+            E.append([N[a], N[b], str(int(rng.integers(10, 500)))])
+    return G, R, I, E
+
+#runs pathGraph with the given engine and returns (seconds, path)
+def timeEngine(graph, engine):
+    start = time.perf_counter()
+    path = accessGraph.pathGraph(graph, engine)
+    return time.perf_counter() - start, path
+
+#runs the dijkstra engine (residential area to store distances only)
+#   returns (seconds, table)
+def timeDijkstra(N, E, gNum, rNum):
+    start = time.perf_counter()
+    table = accessGraph.distTable(accessGraph.prepAdj(N,E), range(gNum, gNum+rNum), range(gNum))
+    return time.perf_counter() - start, table
+
+#builds a contraction hierarchy and uses it to find the residential area to store distances
+#   returns (seconds to build, seconds to find the distances, table)
+def timeHierarchy(N, E, gNum, rNum):
+    src, dst, wt = accessGraph.edgeArrays(N,E)
+    start = time.perf_counter()
+    hierarchy = accessGraph.buildHierarchy(len(N), src, dst, wt, gNum + rNum)
+    built = time.perf_counter()
+    table = accessGraph.hierarchyTable(len(N), hierarchy, range(gNum, gNum+rNum), range(gNum))
+    return built - start, time.perf_counter() - built, table
+
+#runs the whole program on one input file, the same as the run command
+#   returns a dictionary of the seconds taken by each stage (see accessGraph.profileStage)
+#   and the text written to the output file
+def timePipeline(inFile, outFile, engine, num, simplify = True):
+    accessGraph.runFile(inFile, outFile, num, engine=engine, simplify=simplify, profile=True, profileMemory=False)
+    with open(os.path.splitext(outFile)[0] + ".profile.json") as file:
+        stages = dict((x["stage"], x["seconds"]) for x in json.load(file)["stages"])
+    with open(outFile) as file:
+        return stages, file.read()
+
+#checks that every engine gives the same rankings as the original loop engine
+#   (on the full graph), with and without simplifying the graph first
+#returns a list of the engines (and settings) that gave different rankings
+def checkPipeline(inFile, folder, num):
+    ref = timePipeline(inFile, os.path.join(folder, "ref.out.txt"), 'loop', num, False)[1]
+    wrong = []
+    for engine in accessGraph.ENGINES:
+        for simplify in (False, True):
+            if(engine == 'loop' and not simplify):
+                continue
+            name = engine + (" (simplified)" if simplify else "")
+            if(timePipeline(inFile, os.path.join(folder, "check.out.txt"), engine, num, simplify)[1] != ref):
+                wrong.append(name)
+    return wrong
+
+#edge blocks that loadFile must reject, each with the line it must report
+#   (the nodes and the <EDGES> line take up lines 1 to 6)
+MALFORMED = {"two edges on one line, then a blank line": (["G001 R001 5 R001 R002 7", "R002 I001 2", ""], 7),
+             "two edges on one line": (["G001 R001 5 R001 R002 7", "R002 I001 2"], 7),
+             "four values, then two": (["G001 R001 5 R001", "R002 7"], 7),
+             "unknown node after a blank line": (["G001 R001 5", "", "R002 X001 2"], 9)}
+
+#checks that loadFile rejects every file in MALFORMED with the right line number,
+#   however the lines are spread across blank lines
+#returns a list of the cases that were not rejected (or gave the wrong line)
+def checkMalformed(folder):
+    wrong = []
+    for name, (lines, ln) in MALFORMED.items():
+        inFile = os.path.join(folder, "malformed.txt")
+        with open(inFile, "w") as file:
+            file.write("<NODES>\nG001 GS One\nR001 RA One\nR002 RA Two\nI001 Intersection\n<EDGES>\n")
+            file.write("\n".join(lines) + "\n")
+        try:
+            accessGraph.loadFile(inFile)
+            wrong.append(name)
+        except SystemExit as error:
+            if(("on Line " + str(ln) + " ") not in str(error)):
+                wrong.append(name)
+    return wrong
+
+#copies some of the edges of a graph with different lengths, so the check also covers
+#   nodes joined by more than one edge (makeGraph never makes them)
+#   E is the list of edges from makeGraph
+#   about one edge in ten gets a shorter copy listed before it (with its ends swapped),
+#   and another one in ten gets a longer copy listed after it
+#returns the new list of edges
+def repeatEdges(E, seed = 1):
+    rng = np.random.default_rng(seed)
+    result = []
+    for x in E:
+        pick = rng.random()
+        if(pick < 0.1):
+            result.append([x[1], x[0], str(max(1, int(float(x[2])) // 2))])
+        result.append(x)
+        if(pick >= 0.1 and pick < 0.2):
+            result.append([x[0], x[1], str(int(float(x[2])) * 2)])
+    return result
+
+#times the whole program on generated graphs of each size (see the top of this file)
+def pipeline(args):
+    #saved results would hide the time taken to solve each graph
+    accessGraph.CACHE_DIR = None
+    times = []
+    checks = []
+    stages = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in args.sizes:
+            stores = max(1, n // 10)
+            areas = max(1, (n * 2) // 5)
+            inFile = os.path.join(folder, "graph" + str(n) + ".txt")
+            G, R, I, E = generate.makeGraph(stores, areas, max(0, n - stores - areas), args.type, seed=args.seed)
+            generate.writeGraph(inFile, G, R, I, E)
+            found = timePipeline(inFile, os.path.join(folder, "graph" + str(n) + ".out.txt"), args.engine, args.num)[0]
+            times.append(found)
+            stages += [x for x in found if x not in stages]
+            if(n <= args.check_limit):
+                wrong = checkPipeline(inFile, folder, args.num)
+                #the same graph again, with some nodes joined by more than one edge
+                repeatFile = os.path.join(folder, "repeat" + str(n) + ".txt")
+                generate.writeGraph(repeatFile, G, R, I, repeatEdges(E, args.seed))
+                wrong += [x + " (repeated edges)" for x in checkPipeline(repeatFile, folder, args.num)]
+                checks.append("yes" if not wrong else "NO (" + ", ".join(wrong) + ")")
+            else:
+                checks.append("-")
+        malformed = checkMalformed(folder)
+
+    print("Nodes   " + "".join(x.ljust(16) for x in stages) + "match")
+    for n, found, check in zip(args.sizes, times, checks):
+        print(str(n).ljust(8) + "".join(("{:.4f}".format(found[x]) if x in found else "-").ljust(16) for x in stages) + check)
+    #the slope of log(time) against log(nodes)
+    slopes = []
+    for x in stages:
+        points = [(n, found[x]) for n, found in zip(args.sizes, times) if found.get(x, 0) > 0]
+        if(len(points) >= 2 and len(set(n for n, y in points)) >= 2):
+            slopes.append("{:.2f}".format(np.polyfit(np.log([n for n, y in points]), np.log([y for n, y in points]), 1)[0]))
+        else:
+            slopes.append("-")
+    print("growth  " + "".join(x.ljust(16) for x in slopes))
+    print("malformed files rejected: " + ("yes" if not malformed else "NO (" + ", ".join(malformed) + ")"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pathGraph engines on random graphs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000],
+                        help="number of nodes in each test graph")
+    parser.add_argument("--loop-limit", type=int, default=100,
+                        help="largest graph the original loop engine is run on")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tile", type=int, default=accessGraph.TILE_SIZE,
+                        help="tile size for the blocked engine")
+    parser.add_argument("--threads", type=int, default=accessGraph.THREADS,
+                        help="threads for the blocked engine (default: one per core)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="time every stage of the program on generated input files instead")
+    parser.add_argument("--type", choices=generate.TYPES, default="street",
+                        help="the type of graph to generate for --pipeline (default: street)")
+    parser.add_argument("--engine", choices=accessGraph.ENGINES, default="numpy",
+                        help="the engine to time for --pipeline (default: numpy)")
+    parser.add_argument("--num", type=int, default=5,
+                        help="the number of nearest grocery stores to check for --pipeline (default: 5)")
+    parser.add_argument("--check-limit", type=int, default=60,
+                        help="largest graph whose rankings are checked against the loop engine for --pipeline")
+    args = parser.parse_args()
+    accessGraph.TILE_SIZE = args.tile
+    accessGraph.THREADS = args.threads
+    if(args.pipeline):
+        pipeline(args)
+        return
+
+    print("Nodes     loop (s)        numpy (s)     blocked (s)   dijkstra (s)  hierarchy (s)     speedup   match")
+    lastLoop = None
+    for n in args.sizes:
+        G, R, I, E = randomGraph(n, seed = args.seed)
+        N = []
+        accessGraph.loadNodes(G,R,I,N)
+        graph = accessGraph.prepGraph(N,E)
+
+        numpyTime, numpyPath = timeEngine(graph, 'numpy')
+        blockedTime, blockedPath = timeEngine(graph, 'blocked')
+        if(not np.array_equal(blockedPath, numpyPath, equal_nan=True)):
+            print("    Warning: blocked and numpy engines disagree on " + str(n) + " nodes")
+        dijkstraTime, table = timeDijkstra(N, E, len(G), len(R))
+        if(not np.allclose(table, numpyPath[len(G):len(G)+len(R), :len(G)], equal_nan=True)):
+            print("    Warning: dijkstra and numpy engines disagree on " + str(n) + " nodes")
+        buildTime, queryTime, table = timeHierarchy(N, E, len(G), len(R))
+        if(not np.allclose(table, numpyPath[len(G):len(G)+len(R), :len(G)], equal_nan=True)):
+            print("    Warning: hierarchy and numpy engines disagree on " + str(n) + " nodes")
+        if(n <= args.loop_limit):
+            loopTime, loopPath = timeEngine(graph, 'loop')
+            lastLoop = (n, loopTime)
+            loopStr = "{:.4f}".format(loopTime)
+            match = "yes" if np.array_equal(loopPath, numpyPath, equal_nan=True) else "NO"
+        elif(lastLoop is not None):
+            loopTime = lastLoop[1] * (n / lastLoop[0]) ** 3
+            loopStr = "~{:.1f} (est)".format(loopTime)
+            match = "-"
+        else:
+            loopTime = None
+            loopStr = "skipped"
+            match = "-"
+
+        speedStr = "-" if loopTime is None else "{:.0f}x".format(loopTime / numpyTime)
+        print(str(n).ljust(10) + loopStr.ljust(16) + "{:.4f}".format(numpyTime).ljust(14)
+              + "{:.4f}".format(blockedTime).ljust(14) + "{:.4f}".format(dijkstraTime).ljust(14)
+              + ("{:.2f}+{:.4f}".format(buildTime, queryTime)).ljust(18) + speedStr.ljust(10) + match)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+__author__ = "Blake Harrison"
+__copyright__ = "Copyright 2021"
+__credits__ = [""]
+__license__ = "GPLv3"
+__version__ = "1.5.2"
+__maintainer__ = ""
+__email__ = "bharriso@highpoint.edu"
+__status__ = "Release"
+
+#writes random input files that accessGraph.py can read, for testing and benchmarks
+#
+#usage:
+#   python3 generate.py <output file> [--type street] [--stores 10] [--areas 40]
+#                       [--intersections 150] [--edges N] [--weights distance]
+#                       [--min 10] [--max 500] [--seed 1]
+#
+#types of graph:
+#   grid      - every node is a corner of a square grid, joined to the nodes beside it
+#   geometric - nodes are scattered at random, and nearby nodes are joined
+#   street    - a grid with some roads missing, chains of intersections along the
+#               roads that are left, and dead-end streets, which is closer to real map data
+#the grocery stores and residential areas are placed at random nodes
+#the graph is always connected
+#
+#types of edge length (--weights):
+#   distance  - the straight line distance between the two nodes (the nodes are 100 apart
+#               on the grid). Uses --min as the shortest length
+#   uniform   - any whole number from --min to --max, all equally likely
+#   normal    - centred halfway between --min and --max, kept within them
+#   lognormal - mostly short, with a few very long edges, kept within --min and --max
+
+import argparse
+
+import numpy as np
+
+TYPES = ['grid', 'geometric', 'street']
+WEIGHTS = ['distance', 'uniform', 'normal', 'lognormal']
+
+#the distance between neighbouring grid nodes, and the scale of the other types
+SPACING = 100
+
+#builds a random graph
+#   stores, areas, intersections are the number of each type of node
+#   kind is one of TYPES and weights is one of WEIGHTS
+#   edges is the number of edges to make (by default, about twice the number of nodes).
+#       A connected graph needs at least one less edge than there are nodes, and each type
+#       can only make so many, so the number made may be higher or lower than asked
+#   low and high are the shortest and longest edge lengths (see WEIGHTS)
+#   seed is the random seed, so the same settings always make the same graph
+#returns the lists G, R, I, E in the same (split) form main() uses
+def makeGraph(stores, areas, intersections, kind = 'street', edges = None, weights = 'distance',
+              low = 10, high = 500, seed = 1):
+    rng = np.random.default_rng(seed)
+    n = stores + areas + intersections
+    if(edges is None):
+        edges = 2 * n
+    if(kind == 'grid'):
+        pos, pairs = gridEdges(n, edges, rng)
+    elif(kind == 'geometric'):
+        pos, pairs = geometricEdges(n, edges, rng)
+    elif(kind == 'street'):
+        pos, pairs = streetEdges(n, edges, rng)
+    else:
+        raise ValueError("unknown graph type '" + str(kind) + "'")
+    lengths = edgeLengths(pos, pairs, weights, low, high, rng)
+
+    #places the stores and residential areas at random nodes
+    order = rng.permutation(n)
+    codes = [None] * n
+    G = []
+    R = []
+    I = []
+    for x in range(n):
+        if(x < stores):
+            codes[order[x]] = "G" + str(x + 1).zfill(4)
+            G.append([codes[order[x]], "Store", str(x + 1)])
+        elif(x < stores + areas):
+            codes[order[x]] = "R" + str(x - stores + 1).zfill(4)
+            R.append([codes[order[x]], "Area", str(x - stores + 1)])
+        else:
+            codes[order[x]] = "I" + str(x - stores - areas + 1).zfill(4)
+            I.append([codes[order[x]], "Intersection", str(x - stores - areas + 1)])
+    E = [[codes[a], codes[b], str(w)] for (a, b), w in zip(pairs, lengths)]
+    return G, R, I, E
+
+#picks which of the possible edges to use
+#   n is the number of nodes
+#   pairs is the list of possible edges (node pairs), and extra is a list of pairs that
+#       are only used if they are needed to connect the graph
+#   count is the number of edges wanted
+#edges are first picked (in random order) to connect every node, then the rest are
+#   added at random until there are count edges
+#returns the list of pairs picked
+def pickEdges(n, pairs, extra, count, rng):
+    pairs = [pairs[x] for x in rng.permutation(len(pairs))]
+    #union-find, to tell whether an edge joins two pieces that are not yet connected
+    parent = list(range(n))
+    tree = []
+    rest = []
+    for x in range(len(pairs) + len(extra)):
+        a, b = pairs[x] if x < len(pairs) else extra[x - len(pairs)]
+        while(parent[a] != a):
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while(parent[b] != b):
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if(a != b):
+            parent[a] = b
+            tree.append(pairs[x] if x < len(pairs) else extra[x - len(pairs)])
+        elif(x < len(pairs)):
+            rest.append(pairs[x])
+    return tree + rest[0:max(0, count - len(tree))]
+
+#a square grid of n nodes, joined to the nodes beside them
+#   the nodes are moved a little from their grid points, so edge lengths are not all the same
+#returns the position of each node and the pairs of nodes joined
+def gridEdges(n, count, rng):
+    side = int(np.ceil(np.sqrt(n)))
+    pos = np.array([[x % side, x // side] for x in range(n)], dtype=np.float64)
+    pos = (pos + rng.uniform(-0.2, 0.2, pos.shape)) * SPACING
+    pairs = []
+    for x in range(n):
+        if(x % side + 1 < side and x + 1 < n):
+            pairs.append((x, x + 1))
+        if(x + side < n):
+            pairs.append((x, x + side))
+    return pos, pickEdges(n, pairs, [], count, rng)
+
+#n nodes scattered at random, with each node joined to nearby nodes
+#   the search distance is set so there are about twice as many nearby pairs as
+#   edges asked for. Nodes are sorted into square cells of that size, so only the
+#   nodes in the same and neighbouring cells need to be checked
+#returns the position of each node and the pairs of nodes joined
+def geometricEdges(n, count, rng):
+    size = np.sqrt(n) * SPACING
+    pos = rng.uniform(0, size, (n, 2))
+    #each node has about n * pi * radius^2 / size^2 neighbours
+    radius = size * np.sqrt(max(4.0 * count / max(n, 1), 1.0) / (np.pi * max(n, 1)))
+    cells = {}
+    for x in range(n):
+        cells.setdefault((int(pos[x][0] // radius), int(pos[x][1] // radius)), []).append(x)
+    pairs = []
+    for (cx, cy), here in cells.items():
+        here = np.array(here)
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            if((cx + dx, cy + dy) not in cells):
+                continue
+            there = np.array(cells[(cx + dx, cy + dy)])
+            dist = np.hypot(pos[here][:, None, 0] - pos[there][None, :, 0], pos[here][:, None, 1] - pos[there][None, :, 1])
+            a, b = np.nonzero(dist <= radius)
+            for x, y in zip(here[a].tolist(), there[b].tolist()):
+                if((dx, dy) != (0, 0) or x < y):
+                    pairs.append((x, y))
+    #joins nodes next to each other from left to right, in case the graph is not connected
+    order = np.argsort(pos[:, 0]).tolist()
+    extra = list(zip(order[:-1], order[1:]))
+    return pos, pickEdges(n, pairs, extra, count, rng)
+
+#a grid of streets like a town map: about half of the nodes are street corners on a grid,
+#   with some of the roads between them missing. The rest are either along a road (the
+#   road is split into a chain of shorter roads) or at the end of a dead-end street
+#returns the position of each node and the pairs of nodes joined
+def streetEdges(n, count, rng):
+    corners = max(1, min(n, n // 2))
+    side = int(np.ceil(np.sqrt(corners)))
+    pos = [[(x % side) * SPACING, (x // side) * SPACING] for x in range(corners)]
+    pairs = []
+    for x in range(corners):
+        if(x % side + 1 < side and x + 1 < corners):
+            pairs.append((x, x + 1))
+        if(x + side < corners):
+            pairs.append((x, x + side))
+    #every node added later adds exactly one edge, so this many grid roads are kept
+    pairs = pickEdges(corners, pairs, [], count - (n - corners), rng)
+
+    for x in range(corners, n):
+        if(rng.random() < 0.7 and pairs):
+            #splits a road in two
+            y = int(rng.integers(len(pairs)))
+            a, b = pairs[y]
+            share = rng.uniform(0.2, 0.8)
+            pos.append([pos[a][0] + (pos[b][0] - pos[a][0]) * share, pos[a][1] + (pos[b][1] - pos[a][1]) * share])
+            pairs[y] = (a, x)
+            pairs.append((x, b))
+        else:
+            #adds a dead-end street off a random node
+            a = int(rng.integers(x))
+            angle = rng.uniform(0, 2 * np.pi)
+            length = rng.uniform(0.2, 0.6) * SPACING
+            pos.append([pos[a][0] + np.cos(angle) * length, pos[a][1] + np.sin(angle) * length])
+            pairs.append((a, x))
+    return np.array(pos, dtype=np.float64), pairs
+
+#gives each edge a whole number length (see WEIGHTS)
+#   pos is the position of each node and pairs holds the two nodes of each edge
+#returns the list of lengths
+def edgeLengths(pos, pairs, weights, low, high, rng):
+    if(not pairs):
+        return []
+    ends = np.array(pairs)
+    if(weights == 'distance'):
+        lengths = np.hypot(*(pos[ends[:, 0]] - pos[ends[:, 1]]).T)
+        return np.maximum(np.rint(lengths), low).astype(np.int64).tolist()
+    elif(weights == 'uniform'):
+        lengths = rng.uniform(low, high, len(pairs))
+    elif(weights == 'normal'):
+        lengths = rng.normal((low + high) / 2, (high - low) / 6, len(pairs))
+    elif(weights == 'lognormal'):
+        lengths = low * rng.lognormal(0, 1, len(pairs))
+    else:
+        raise ValueError("unknown weight type '" + str(weights) + "'")
+    return np.clip(np.rint(lengths), low, high).astype(np.int64).tolist()
+
+#writes the lists from makeGraph to an input file
+def writeGraph(outFile, G, R, I, E):
+    with open(outFile, 'w') as file:
+        file.write("<NODES>\n")
+        for x in G + R + I:
+            file.write(" ".join(x) + "\n")
+        file.write("<EDGES>\n")
+        for x in E:
+            file.write(" ".join(x) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a random input file for accessGraph.py.")
+    parser.add_argument("outFile", help="the input file to write")
+    parser.add_argument("--type", choices=TYPES, default="street", help="the shape of the graph (default: street)")
+    parser.add_argument("--stores", type=int, default=10, help="the number of grocery stores (default: 10)")
+    parser.add_argument("--areas", type=int, default=40, help="the number of residential areas (default: 40)")
+    parser.add_argument("--intersections", type=int, default=150, help="the number of intersections (default: 150)")
+    parser.add_argument("--edges", type=int, default=None, help="the number of edges (default: twice the number of nodes)")
+    parser.add_argument("--weights", choices=WEIGHTS, default="distance", help="how edge lengths are picked (default: distance)")
+    parser.add_argument("--min", type=int, default=10, help="the shortest edge length (default: 10)")
+    parser.add_argument("--max", type=int, default=500, help="the longest edge length, except for distance weights (default: 500)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    G, R, I, E = makeGraph(args.stores, args.areas, args.intersections, args.type, args.edges,
+                           args.weights, args.min, args.max, args.seed)
+    writeGraph(args.outFile, G, R, I, E)
+    print("    Wrote " + str(len(G) + len(R) + len(I)) + " nodes and " + str(len(E)) + " edges to '" + args.outFile + "'")
+
+if __name__ == "__main__":
+    main()
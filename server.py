@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+
+__author__ = "Blake Harrison"
+__copyright__ = "Copyright 2021"
+__credits__ = [""]
+__license__ = "GPLv3"
+__version__ = "1.5.2"
+__maintainer__ = ""
+__email__ = "bharriso@highpoint.edu"
+__status__ = "Release"
+
+#answers queries about one or more graphs over HTTP, keeping each graph and its
+#   distance table in memory, so each query does not have to read and solve the file again
+#
+#usage:
+#   python3 server.py <graphs> [--port 8040] [--host 127.0.0.1] [--socket PATH]
+#                     [--data FOLDER] [--engine numpy] [--no-simplify] [--jobs N]
+#
+#each graph is given as name=file (e.g. town=graphs/town.txt), or just the file, in which
+#   case it is named after the file (graphs/town.txt is named town)
+#with --socket, the server listens on a Unix socket instead of a port, e.g.
+#   curl --unix-socket /tmp/access.sock "http://localhost/rank?graph=town"
+#
+#queries (every answer is JSON, except /export):
+#   GET  /graphs
+#       the graphs loaded (and being loaded), and their sizes
+#   POST /graphs?name=town&file=graphs/town.txt
+#       loads another graph, or loads a graph again after its file has changed
+#       the file must be in the --data folder (by default, the folder the server was
+#       started in), and is found from there
+#   GET  /rank?graph=town[&num=5][&top=10][&order=longest]
+#       the residential areas ranked by the average distance to their num nearest
+#       grocery stores, the same as the Get Output menu option
+#   GET  /nearest?graph=town&area=R001[&area=R002...][&k=5][&radius=500]
+#       the k nearest grocery stores to each area, and with radius, the number of
+#       stores within that distance and their average distance
+#   POST /scenarios?graph=town[&num=5]
+#       scores the scenarios in the body (written as in a scenario file, see
+#       accessGraph.readScenarios) against the graph, the same as the scenarios command
+#   GET  /export?graph=town[&num=5][&format=csv][&table=1][&nearest=1]
+#       the whole ranking as a CSV file (format=csv), or as an npz file that can also hold
+#       the distance table and the nearest stores to each area (format=npz, see
+#       accessGraph.exportResults)
+#distances are in the units of the input file, and areas that can not reach any grocery
+#   store have an average of null
+#
+#graphs are read and solved in worker processes, so a large graph being loaded does
+#   not hold up queries on the graphs that are already loaded. The other queries run
+#   in threads, and queries for a graph that is still loading wait for it to finish
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import urllib.parse
+
+import numpy as np
+
+import accessGraph
+
+#the graphs that have been loaded, by name (see loadGraph)
+graphs = {}
+#the graphs being loaded, by name. Each is an asyncio task that finishes with the graph
+loading = {}
+#the processes that read and solve the graphs (set by serve)
+solvers = None
+#the folder POST /graphs may load files from (set by serve). Files outside it are refused,
+#   so a client can not make the server read any file on the machine
+dataDir = None
+
+#the reason given with each status code
+STATUS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 500: "Internal Server Error"}
+#the largest request body the server will read, in bytes (a body of scenarios is the
+#   only one used, and even a large one is a few megabytes)
+MAX_BODY = 64 * 1024**2
+
+#an error to send back to the client
+#   status is the HTTP status code, and the message is sent as {"error": message}
+class QueryError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+#reads and solves one graph, in a worker process
+#   inFile is the input file (text or compiled)
+#   engine is the shortest path engine to use (see accessGraph.ENGINES)
+#   simplify is true to solve the simplified graph (see accessGraph.simplifyGraph)
+#the full graph is kept for scenarios, which may change any node or edge
+#returns a dictionary holding the nodes and edges, and the residential area by
+#   grocery store distance table
+def loadGraph(inFile, engine = 'numpy', simplify = True):
+    start = time.perf_counter()
+    G, R, I, N, src, dst, wt, adj, stored = accessGraph.readGraph(inFile)
+    graph = {"file": inFile, "G": G, "R": R, "N": N, "src": src, "dst": dst, "wt": wt,
+             "intersections": len(I), "removed": [0, 0], "engine": engine}
+    if(simplify):
+        I, N, src, dst, wt, adj, graph["removed"] = accessGraph.simplifyGraph(G,R,I,N,src,dst,wt,adj)
+    path, table = accessGraph.solveGraph(G,R,N,src,dst,wt,adj,stored,engine)
+    if(table is None):
+        #the nearest engine does not find every distance, so they are found here
+        table = accessGraph.baseTable(G,R,N,src,dst,wt,adj,stored,accessGraph.DTYPE)
+    graph["table"] = np.ascontiguousarray(table)
+    graph["seconds"] = time.perf_counter() - start
+    return graph
+
+#loads a graph and adds it to graphs (see loadGraph)
+#   name is the name to give the graph, the rest is the same as in loadGraph
+#the file is read and solved in a worker process, then the index used by /rank
+#   (see accessGraph.distIndex) is built in a thread
+#returns the graph
+async def addGraph(name, inFile, engine, simplify):
+    loop = asyncio.get_running_loop()
+    try:
+        try:
+            graph = await loop.run_in_executor(solvers, loadGraph, inFile, engine, simplify)
+        #a sys.exit from accessGraph would otherwise stop the server
+        except SystemExit as error:
+            raise QueryError(400, errorText(error))
+        graph["index"] = await loop.run_in_executor(None, accessGraph.distIndex, graph["table"])
+        graph["codes"] = dict((graph["N"][x], x) for x in range(len(graph["N"])))
+        graphs[name] = graph
+        return graph
+    finally:
+        if(loading.get(name) is asyncio.current_task()):
+            del loading[name]
+
+#starts loading a graph, without waiting for it
+#   the graph keeps answering queries from its last copy (if it has one) until the new one is ready
+def startLoad(name, inFile, engine, simplify):
+    task = asyncio.get_running_loop().create_task(addGraph(name, inFile, engine, simplify))
+    loading[name] = task
+    #an error is sent to the client that asked for the load (if there is one), and printed here
+    def loadFailed(x):
+        if(not x.cancelled() and x.exception() is not None):
+            print("    Error: Could Not Load '" + inFile + "': " + errorText(x.exception()), file=sys.stderr)
+    task.add_done_callback(loadFailed)
+    return task
+
+#gets a graph by name, waiting for it if it is still being loaded
+async def findGraph(name):
+    if(name in graphs):
+        return graphs[name]
+    if(name in loading):
+        try:
+            return await asyncio.shield(loading[name])
+        except Exception as error:
+            raise QueryError(400, "Graph '" + name + "' could not be loaded: " + errorText(error))
+    raise QueryError(404, "Unknown Graph '" + str(name) + "'")
+
+#turns an error into the message sent to the client
+#   the errors from accessGraph are sys.exit messages, which start with spaces
+def errorText(error):
+    if(isinstance(error, SystemExit)):
+        return str(error.code).strip()
+    return str(error) or repr(error)
+
+#gets one value from the query string
+#   params is the dictionary from urllib.parse.parse_qs
+#   kind is the type to turn the value into, and default is used when it is not given
+def getParam(params, name, kind = str, default = None):
+    if(name not in params):
+        if(default is None):
+            raise QueryError(400, "Missing Parameter '" + name + "'")
+        return default
+    try:
+        return kind(params[name][-1])
+    except ValueError:
+        raise QueryError(400, "Invalid Value '" + params[name][-1] + "' for Parameter '" + name + "'")
+
+#gets the input file a client asked to load, from the data folder (see dataDir)
+#   links and '..' are followed first, so they can not be used to leave the folder
+def dataFile(name):
+    inFile = os.path.realpath(os.path.join(dataDir, name))
+    try:
+        inside = os.path.commonpath([inFile, dataDir]) == dataDir
+    #paths on different drives (on Windows)
+    except ValueError:
+        inside = False
+    if(not inside):
+        raise QueryError(403, "Input file '" + name + "' is not in the data folder")
+    if(not os.path.exists(inFile)):
+        raise QueryError(404, "Input file '" + name + "' could not be found")
+    return inFile
+
+#gets the number of grocery stores to check from the query string
+#   it is cut down to the number of stores in the graph, the same as the Get Output menu option
+def getNum(params, graph):
+    num = min(getParam(params, "num", int, 5), len(graph["G"]))
+    if(num <= 0):
+        raise QueryError(400, "The number of grocery stores to check must be greater than 0")
+    return num
+
+#the name of a node, leaving out its code
+def nodeName(node):
+    return " ".join(node[1:])
+
+#turns nan into None, so it is written as null in JSON
+def jsonNum(value):
+    return None if value != value else float(value)
+
+#GET /graphs
+def listGraphs(params, body):
+    found = []
+    for name in sorted(set(graphs) | set(loading)):
+        if(name not in graphs):
+            found.append({"name": name, "loaded": False})
+            continue
+        graph = graphs[name]
+        found.append({"name": name, "loaded": True, "reloading": name in loading, "file": graph["file"],
+                      "engine": graph["engine"], "grocery stores": len(graph["G"]), "residential areas": len(graph["R"]),
+                      "intersections": graph["intersections"], "edges": int(len(graph["src"])),
+                      "simplified": {"nodes": graph["removed"][0], "edges": graph["removed"][1]},
+                      "seconds": round(graph["seconds"], 4)})
+    return {"graphs": found}
+
+#GET /rank
+def rankGraph(graph, params, body):
+    num = getNum(params, graph)
+    top = getParam(params, "top", int, accessGraph.INF)
+    close = getParam(params, "order", str, "longest")
+    if(close not in ("longest", "shortest")):
+        raise QueryError(400, "Invalid Value '" + close + "' for Parameter 'order'. Use 'longest' or 'shortest'")
+    gNum = len(graph["G"])
+    order = accessGraph.rankOrder(accessGraph.indexAvg(graph["index"], num), gNum, close == "longest", top)
+    ranking = []
+    unreachable = []
+    for avg, node in order:
+        area = graph["R"][node-gNum]
+        if(avg != avg):
+            unreachable.append({"area": area[0], "name": nodeName(area)})
+        else:
+            ranking.append({"rank": len(ranking) + 1, "area": area[0], "name": nodeName(area), "average": avg})
+    return {"num": num, "ranking": ranking, "unreachable": unreachable}
+
+#GET /nearest
+def nearestGraph(graph, params, body):
+    if("area" not in params):
+        raise QueryError(400, "Missing Parameter 'area'")
+    gNum = len(graph["G"])
+    rows = []
+    for code in params["area"]:
+        node = graph["codes"].get(code)
+        if(node is None or not gNum <= node < gNum + len(graph["R"])):
+            raise QueryError(404, "Unknown Residential Area '" + code + "'")
+        rows.append(node - gNum)
+    count = getParam(params, "k", int, 5)
+    if(count <= 0):
+        raise QueryError(400, "The number of grocery stores to find must be greater than 0")
+    idx, dist = accessGraph.nearestStores(graph["table"][rows], count)
+    if("radius" in params):
+        #only the rows asked for are searched
+        within, avg = accessGraph.storesWithin(tuple(x[rows] for x in graph["index"]), getParam(params, "radius", float))
+    areas = []
+    for x in range(len(rows)):
+        area = graph["R"][rows[x]]
+        stores = [{"store": graph["G"][y][0], "name": nodeName(graph["G"][y]), "distance": float(d)}
+                  for y, d in zip(idx[x].tolist(), dist[x].tolist()) if y >= 0]
+        areas.append({"area": area[0], "name": nodeName(area), "stores": stores})
+        if("radius" in params):
+            areas[-1]["within"] = int(within[x])
+            areas[-1]["within average"] = jsonNum(avg[x])
+    return {"areas": areas}
+
+#POST /scenarios
+#   the scenarios are scored one after another in this thread, against the distances
+#   already in memory (see accessGraph.scoreScenario)
+def scoreGraph(graph, params, body):
+    scenarios = accessGraph.parseScenarios(body.decode("utf-8").splitlines(), "request")
+    gNum = len(graph["G"])
+    num = getNum(params, graph)
+    avg = accessGraph.indexAvg(graph["index"], num)
+    base = {"N": graph["N"], "src": graph["src"], "dst": graph["dst"], "wt": graph["wt"],
+            "rows": list(range(gNum, gNum+len(graph["R"]))), "cols": list(range(gNum)),
+            "table": graph["table"], "avg": avg, "num": num}
+    results = accessGraph.scenarioResults(avg, [accessGraph.scoreScenario(x, base) for x in scenarios])
+    return {"num": num, "scenarios": [dict((name, jsonNum(y) if isinstance(y, float) else y) for name, y in zip(results[0], x))
+                                      for x in results[1:]]}
+
+#GET /export
+#   the files are written by accessGraph.exportResults to a temporary folder, then sent back
+#returns (content type, file contents)
+def exportGraph(graph, params, body):
+    fmt = getParam(params, "format", str, "csv")
+    table = getParam(params, "table", int, 0)
+    nearest = getParam(params, "nearest", int, 0)
+    if(fmt not in ("csv", "npz")):
+        raise QueryError(400, "Invalid Value '" + fmt + "' for Parameter 'format'. Use 'csv' or 'npz'")
+    if(fmt == "csv" and (table or nearest)):
+        raise QueryError(400, "The distance table and nearest stores can only be exported with format=npz")
+    num = getNum(params, graph)
+    order = accessGraph.rankOrder(accessGraph.indexAvg(graph["index"], num), len(graph["G"]), True)
+    with tempfile.TemporaryDirectory() as folder:
+        files = accessGraph.exportResults(os.path.join(folder, "export"), fmt, graph["R"], graph["G"], order,
+                                          graph["table"] if table else None,
+                                          accessGraph.nearestStores(graph["table"], num) if nearest else None)
+        with open(files[0], "rb") as file:
+            return ("text/csv" if fmt == "csv" else "application/octet-stream"), file.read()
+
+#the queries that need a graph, by path: [method, function]
+QUERIES = {"/rank": ["GET", rankGraph], "/nearest": ["GET", nearestGraph],
+           "/scenarios": ["POST", scoreGraph], "/export": ["GET", exportGraph]}
+
+#the answer sent for an error: the status code, the content type and {"error": message}
+def errorAnswer(status, message):
+    return status, "application/json", json.dumps({"error": message}).encode()
+
+#answers one request
+#   method and target come from the first line of the request, and body is its body
+#returns the status code, the content type and the body of the answer
+async def answer(method, target, body, engine, simplify):
+    url = urllib.parse.urlsplit(target)
+    params = urllib.parse.parse_qs(url.query)
+    loop = asyncio.get_running_loop()
+    try:
+        if(url.path == "/graphs"):
+            if(method == "GET"):
+                found = listGraphs(params, body)
+            elif(method == "POST"):
+                name = getParam(params, "name")
+                inFile = dataFile(getParam(params, "file"))
+                graph = await startLoad(name, inFile, engine, simplify)
+                found = {"name": name, "file": inFile, "seconds": round(graph["seconds"], 4)}
+            else:
+                raise QueryError(405, "Use GET or POST for /graphs")
+        elif(url.path in QUERIES):
+            if(method != QUERIES[url.path][0]):
+                raise QueryError(405, "Use " + QUERIES[url.path][0] + " for " + url.path)
+            graph = await findGraph(getParam(params, "graph"))
+            found = await loop.run_in_executor(None, QUERIES[url.path][1], graph, params, body)
+        else:
+            raise QueryError(404, "Unknown Query '" + url.path + "'")
+    except QueryError as error:
+        return errorAnswer(error.status, str(error))
+    #the errors from accessGraph (such as a bad input file)
+    except SystemExit as error:
+        return errorAnswer(400, errorText(error))
+    except Exception as error:
+        return errorAnswer(500, repr(error))
+    if(isinstance(found, tuple)):
+        return 200, found[0], found[1]
+    return 200, "application/json", json.dumps(found, allow_nan=False).encode()
+
+#reads requests from one connection and answers them
+#   connections are kept open for more requests (HTTP/1.1 keep-alive) unless the client
+#   asks to close it, so a dashboard sending many small queries does not reconnect each time
+async def handleClient(reader, writer, engine, simplify):
+    try:
+        while(True):
+            line = await reader.readline()
+            if(not line.strip()):
+                break
+            part = line.decode("latin-1").split()
+            if(len(part) != 3):
+                break
+            method, target, version = part
+            headers = {}
+            while(True):
+                line = await reader.readline()
+                if(not line.strip()):
+                    break
+                key, value = line.decode("latin-1").split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+            keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                length = -1
+            #the body of a bad request is not read, so the connection is closed after answering
+            if(length < 0):
+                status, kind, data = errorAnswer(400, "Invalid Content-Length '" + headers["content-length"] + "'")
+                keep = False
+            elif(length > MAX_BODY):
+                status, kind, data = errorAnswer(413, "The request body can be at most " + str(MAX_BODY) + " bytes")
+                keep = False
+            else:
+                body = await reader.readexactly(length)
+                status, kind, data = await answer(method, target, body, engine, simplify)
+            writer.write(("HTTP/1.1 " + str(status) + " " + STATUS[status] + "\r\n"
+                          + "Content-Type: " + kind + "\r\n"
+                          + "Content-Length: " + str(len(data)) + "\r\n"
+                          + "Connection: " + ("keep-alive" if keep else "close") + "\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+            if(not keep):
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+#starts the server and loads the graphs, then answers queries until it is stopped
+#   files is a list of [name, input file] pairs
+#   host and port, or path (a Unix socket), are where to listen
+#   engine and simplify are the same as in loadGraph
+#   workers is the number of processes used to solve graphs (by default, one per core)
+#   data is the folder POST /graphs may load files from (by default, the current folder)
+#the graphs in files may be anywhere, since they are chosen by whoever starts the server
+async def serve(files, host = "127.0.0.1", port = 8040, path = None, engine = 'numpy', simplify = True, workers = None, data = None):
+    global solvers, dataDir
+    dataDir = os.path.realpath(os.getcwd() if data is None else data)
+    if(not os.path.isdir(dataDir)):
+        sys.exit("    Error: Invalid Data Folder: '" + dataDir + "' could not be found.")
+    solvers = concurrent.futures.ProcessPoolExecutor(workers)
+    client = lambda reader, writer: handleClient(reader, writer, engine, simplify)
+    if(path is not None):
+        server = await asyncio.start_unix_server(client, path)
+        print("    Listening on " + path)
+    else:
+        server = await asyncio.start_server(client, host, port)
+        print("    Listening on http://" + host + ":" + str(server.sockets[0].getsockname()[1]))
+    for name, inFile in files:
+        #prints the graph once it is ready (errors are printed by startLoad)
+        def loaded(x, name = name):
+            if(not x.cancelled() and x.exception() is None):
+                print("    Loaded " + name + " (" + "{:.2f}".format(x.result()["seconds"]) + " s)")
+        startLoad(name, inFile, engine, simplify).add_done_callback(loaded)
+    #stops the server the same way as Ctrl+C when it is told to end (e.g. by kill), so
+    #   the worker processes are stopped as well instead of being left running
+    if(os.name != 'nt'):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        solvers.shutdown(wait=False, cancel_futures=True)
+
+#splits the graph arguments into [name, input file] pairs
+#   each is name=file, or just the file (named after the file)
+def graphFiles(args):
+    files = []
+    for x in args:
+        if("=" in x):
+            name, inFile = x.split("=", 1)
+        else:
+            name, inFile = os.path.splitext(os.path.basename(x))[0], x
+        if(not os.path.exists(inFile)):
+            sys.exit("    Error: Invalid File Name: '" + inFile + "' could not be found.")
+        files.append([name, inFile])
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer queries about graphs kept in memory.")
+    parser.add_argument("graphs", nargs="*", help="the graphs to load, as name=file or just the file")
+    #the server has no passwords, so anyone who can reach the address can query the graphs
+    #   and load the files in the --data folder. Only listen on other addresses on a trusted network
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="the address to listen on (default: 127.0.0.1). Any other address lets other machines "
+                             "query the server and load any file in the --data folder")
+    parser.add_argument("--port", type=int, default=8040, help="the port to listen on (default: 8040)")
+    parser.add_argument("--socket", default=None, help="listen on this Unix socket instead of a port")
+    parser.add_argument("--data", default=None,
+                        help="the folder POST /graphs may load files from (default: the current folder)")
+    parser.add_argument("--engine", choices=accessGraph.ENGINES, default="numpy", help="the shortest path engine (default: numpy)")
+    parser.add_argument("--no-simplify", action="store_true",
+                        help="solve the full graph, without first removing dead end and chain intersections")
+    parser.add_argument("--jobs", type=int, default=None, help="the number of processes used to solve graphs (default: one per core)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(graphFiles(args.graphs), args.host, args.port, args.socket, args.engine, not args.no_simplify, args.jobs, args.data))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == "__main__":
+    main()